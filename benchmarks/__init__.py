@@ -0,0 +1 @@
+"""Бенчмарки и нагрузочные тесты Zone Manager (в релизный zip не входят)."""
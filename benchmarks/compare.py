@@ -0,0 +1,48 @@
+"""Сравнение двух JSON-отчётов run_benchmarks (поиск регрессий между релизами).
+
+Запуск:
+    python -m benchmarks.compare base.json new.json --threshold 1.2
+
+Код возврата 1, если хотя бы одна операция стала медленнее порога (по median_s).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+
+def _index(report: dict[str, Any]) -> dict[tuple[str, int], dict[str, Any]]:
+    return {(r["op"], r["zones"]): r for r in report.get("results", [])}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two Zone Manager benchmark reports")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio treated as regression")
+    args = parser.parse_args(argv)
+
+    base = _index(json.loads(Path(args.base).read_text(encoding="utf-8")))
+    new = _index(json.loads(Path(args.new).read_text(encoding="utf-8")))
+
+    regressions = 0
+    print(f"{'op':<26} {'zones':>7} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for key in sorted(base.keys() & new.keys()):
+        b = base[key]["median_s"]
+        n = new[key]["median_s"]
+        ratio = n / b if b > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{key[0]:<26} {key[1]:>7} {b * 1e3:>10.3f} {n * 1e3:>10.3f} {ratio:>7.2f}{flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
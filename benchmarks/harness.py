@@ -0,0 +1,109 @@
+"""Тестовый инстанс Home Assistant для бенчмарков и нагрузочных тестов.
+
+Зачем:
+- Поднять настоящий HomeAssistant core во временном config_dir (без UI, без интеграций).
+- Загрузить area/device/entity registry и наполнить их синтетическими сущностями.
+- Создать ZoneManagerStorage так же, как это делает async_setup_entry.
+- Поднять встроенную интеграцию automation для нагрузочных тестов.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from types import SimpleNamespace
+from typing import Any
+
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.zone_manager.const import CONF_CONFIG_PATH, DEFAULT_CONFIG_FILENAME
+from custom_components.zone_manager.storage import ZoneManagerStorage
+
+BENCH_PLATFORM = "zone_manager_bench"
+
+
+async def async_start_test_hass(config_dir: str) -> HomeAssistant:
+    """Создать HomeAssistant и загрузить registries (по образцу тестовых хелперов HA)."""
+    hass = HomeAssistant(config_dir)
+
+    # floor/label registry появились в 2024.4 — area registry на них ссылается
+    try:
+        from homeassistant.helpers import floor_registry as fr
+        from homeassistant.helpers import label_registry as lr
+    except ImportError:
+        fr = lr = None
+
+    if fr is not None:
+        await fr.async_load(hass)
+        await lr.async_load(hass)
+    await ar.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    return hass
+
+
+async def async_stop_test_hass(hass: HomeAssistant) -> None:
+    """Остановить инстанс (flush отложенных записей registry во временный каталог)."""
+    await hass.async_stop(force=True)
+
+
+def populate_registries(hass: HomeAssistant, entities: list[tuple[str, str]]) -> None:
+    """Зарегистрировать сущности с area и friendly_name в state machine.
+
+    entities: список (entity_id, area_name) — см. synthetic.iter_entities.
+    """
+    area_reg = ar.async_get(hass)
+    ent_reg = er.async_get(hass)
+    area_ids: dict[str, str] = {}
+
+    for entity_id, area_name in entities:
+        area_id = area_ids.get(area_name)
+        if area_id is None:
+            area = area_reg.async_get_area_by_name(area_name) or area_reg.async_create(area_name)
+            area_id = area_ids[area_name] = area.id
+
+        domain, object_id = entity_id.split(".", 1)
+        entry = ent_reg.async_get_or_create(domain, BENCH_PLATFORM, object_id, suggested_object_id=object_id)
+        ent_reg.async_update_entity(entry.entity_id, area_id=area_id)
+        hass.states.async_set(entry.entity_id, "off", {"friendly_name": object_id.replace("_", " ")})
+
+
+def write_config_file(config_dir: str, config: dict[str, Any]) -> str:
+    """Записать конфиг так же, как его пишет интеграция (indent=2, ensure_ascii=False)."""
+    path = os.path.join(config_dir, DEFAULT_CONFIG_FILENAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def make_storage(hass: HomeAssistant, path: str) -> ZoneManagerStorage:
+    """ZoneManagerStorage поверх минимального entry (storage читает только entry.data)."""
+    entry = SimpleNamespace(entry_id="bench", data={CONF_CONFIG_PATH: path})
+    return ZoneManagerStorage(hass=hass, entry=entry)
+
+
+async def async_setup_automations(hass: HomeAssistant, automations: list[dict[str, Any]]) -> None:
+    """Загрузить automation с заданным конфигом (как в тестовых хелперах HA).
+
+    Инстанс переводится в running: automation включает триггеры только после старта HA.
+    """
+    from homeassistant import config_entries, loader
+    from homeassistant.setup import async_setup_component
+
+    if hasattr(loader, "async_setup"):
+        loader.async_setup(hass)
+    if getattr(hass, "config_entries", None) is None:
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+
+    if hasattr(hass, "set_state"):
+        hass.set_state(CoreState.running)
+    else:
+        hass.state = CoreState.running
+
+    if not await async_setup_component(hass, "automation", {"automation": automations}):
+        raise RuntimeError("Failed to set up automation component")
+    await hass.async_block_till_done()
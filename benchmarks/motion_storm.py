@@ -0,0 +1,260 @@
+"""Нагрузочный тест «шторм движения» для горячего пути get_sensor_config.
+
+Зачем:
+- Понять, сколько срабатываний датчиков в секунду выдерживает связка
+  automation -> zone_manager.get_sensor_config до роста задержки.
+- Трасса (пуассоновские всплески или проходы по коридорам) проигрывается в реальном времени
+  на тестовом инстансе HA с фейковыми датчиками движения.
+- Задержка end-to-end: от установки состояния датчика в "on" до события,
+  которое автоматизация шлёт после получения ответа сервиса.
+
+Запуск (из корня репозитория, нужен установленный homeassistant):
+    python -m benchmarks.motion_storm --zones 5000 --trace poisson --rate 200 --duration 30
+    python -m benchmarks.motion_storm --trace corridor --walkers 300 --reload both
+
+--driver direct убирает движок автоматизаций и вызывает сервис из слушателя state_changed
+(измеряет только интеграцию).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+
+from custom_components.zone_manager.const import DOMAIN
+from custom_components.zone_manager.registry import get_registry
+from custom_components.zone_manager.services import async_register_services
+
+from .harness import (
+    async_setup_automations,
+    async_start_test_hass,
+    async_stop_test_hass,
+    make_storage,
+    write_config_file,
+)
+from .run_benchmarks import _meta
+from .synthetic import BuildingSpec, corridor_trace, generate_config, poisson_trace
+
+DONE_EVENT = "zone_manager_bench_done"
+
+
+def _percentile_ms(sorted_values: list[float], pct: float) -> float | None:
+    """Перцентиль по nearest-rank в мс (значения уже отсортированы); None — если данных нет."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1] * 1e3
+
+
+def _automation_config(sensors: list[str], reload: bool) -> list[dict[str, Any]]:
+    """Автоматизация как в реальных off/on-сценариях: триггер -> сервис -> использование ответа."""
+    return [
+        {
+            "id": "zone_manager_bench",
+            "alias": "Zone Manager bench",
+            "mode": "parallel",
+            "max": 100000,
+            "trigger": {"platform": "state", "entity_id": sensors, "to": "on"},
+            "action": [
+                {
+                    "service": f"{DOMAIN}.get_sensor_config",
+                    "data": {"entity_id": "{{ trigger.entity_id }}", "reload": reload},
+                    "response_variable": "cfg",
+                },
+                {
+                    "event": DONE_EVENT,
+                    "event_data": {
+                        "entity_id": "{{ trigger.entity_id }}",
+                        "found": "{{ cfg.found }}",
+                    },
+                },
+            ],
+        }
+    ]
+
+
+def _setup_direct_driver(hass: HomeAssistant, sensors: set[str], reload: bool) -> None:
+    """Альтернатива automation: слушатель state_changed сам вызывает сервис."""
+
+    async def _handle(entity_id: str) -> None:
+        resp = await hass.services.async_call(
+            DOMAIN,
+            "get_sensor_config",
+            {"entity_id": entity_id, "reload": reload},
+            blocking=True,
+            return_response=True,
+        )
+        hass.bus.async_fire(DONE_EVENT, {"entity_id": entity_id, "found": resp.get("found")})
+
+    @callback
+    def _on_state(event: Event) -> None:
+        entity_id = event.data.get("entity_id")
+        new_state = event.data.get("new_state")
+        if entity_id in sensors and new_state is not None and new_state.state == "on":
+            hass.async_create_task(_handle(entity_id))
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _on_state)
+
+
+async def _run_once(args: argparse.Namespace, config: dict[str, Any], trace: list[tuple[float, str]], reload: bool) -> dict[str, Any]:
+    """Один прогон трассы на свежем инстансе HA."""
+    sensors = sorted({key for space_obj in config["spaces"].values() for key in space_obj["zones"]})
+
+    with tempfile.TemporaryDirectory(prefix="zone_manager_storm_") as config_dir:
+        hass = await async_start_test_hass(config_dir)
+        try:
+            path = write_config_file(config_dir, config)
+            storage = make_storage(hass, path)
+            await storage.async_load()
+            get_registry(hass).async_add(storage)
+            await async_register_services(hass)
+
+            for entity_id in sensors:
+                hass.states.async_set(entity_id, "off")
+
+            if args.driver == "automation":
+                await async_setup_automations(hass, _automation_config(sensors, reload))
+            else:
+                _setup_direct_driver(hass, set(sensors), reload)
+
+            pending: dict[str, deque[float]] = defaultdict(deque)
+            latencies: list[float] = []
+            all_done = asyncio.Event()
+            expected = len(trace)
+
+            @callback
+            def _on_done(event: Event) -> None:
+                queue = pending.get(event.data.get("entity_id"))
+                if not queue:
+                    return
+                latencies.append(time.perf_counter() - queue.popleft())
+                if len(latencies) >= expected:
+                    all_done.set()
+
+            hass.bus.async_listen(DONE_EVENT, _on_done)
+
+            # Open-loop проигрывание: если отстаём от расписания — не ждём, а догоняем
+            max_lag = 0.0
+            start = time.perf_counter()
+            for offset, entity_id in trace:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+
+                if hass.states.get(entity_id).state == "on":
+                    hass.states.async_set(entity_id, "off")
+                pending[entity_id].append(time.perf_counter())
+                hass.states.async_set(entity_id, "on")
+
+            if expected:
+                try:
+                    await asyncio.wait_for(all_done.wait(), timeout=args.drain_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            elapsed = time.perf_counter() - start
+            await hass.async_block_till_done()
+        finally:
+            await async_stop_test_hass(hass)
+
+    latencies.sort()
+    return {
+        "reload": reload,
+        "driver": args.driver,
+        "trace": args.trace,
+        "zones": len(sensors),
+        "events": expected,
+        "offered_eps": expected / args.duration if args.duration else 0.0,
+        "completed": len(latencies),
+        "timeouts": expected - len(latencies),
+        "elapsed_s": elapsed,
+        "throughput_eps": len(latencies) / elapsed if elapsed else 0.0,
+        "max_schedule_lag_ms": max_lag * 1e3,
+        "latency_ms": {
+            "p50": _percentile_ms(latencies, 50),
+            "p95": _percentile_ms(latencies, 95),
+            "p99": _percentile_ms(latencies, 99),
+            "max": _percentile_ms(latencies, 100),
+            "mean": statistics.fmean(latencies) * 1e3 if latencies else None,
+        },
+    }
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Zone Manager motion-storm load test (JSON output)")
+    parser.add_argument("--zones", type=int, default=1000)
+    parser.add_argument("--zones-per-space", type=int, default=50)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--light-groups", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace", choices=("poisson", "corridor"), default="poisson")
+    parser.add_argument("--duration", type=float, default=20.0, help="Trace length, seconds")
+    parser.add_argument("--rate", type=float, default=50.0, help="poisson: base events per second")
+    parser.add_argument("--burst-factor", type=float, default=5.0)
+    parser.add_argument("--burst-every", type=float, default=10.0)
+    parser.add_argument("--burst-len", type=float, default=2.0)
+    parser.add_argument("--walkers", type=int, default=100, help="corridor: people walking")
+    parser.add_argument("--step", type=float, default=1.5, help="corridor: seconds per zone")
+    parser.add_argument("--reload", choices=("off", "on", "both"), default="both")
+    parser.add_argument("--driver", choices=("automation", "direct"), default="automation")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Wait for in-flight calls, seconds")
+    parser.add_argument("--output", help="Write JSON to file instead of stdout")
+    parser.add_argument("--log-level", default="ERROR", help="Log level for the integration during runs")
+    return parser.parse_args(argv)
+
+
+async def _async_main(args: argparse.Namespace) -> dict[str, Any]:
+    spec = BuildingSpec(
+        zones=args.zones,
+        zones_per_space=args.zones_per_space,
+        fanout=args.fanout,
+        light_groups_per_space=args.light_groups,
+        seed=args.seed,
+    )
+    config = generate_config(spec)
+    if args.trace == "poisson":
+        trace = poisson_trace(
+            config, args.rate, args.duration, args.burst_factor, args.burst_every, args.burst_len, seed=args.seed
+        )
+    else:
+        trace = corridor_trace(config, args.walkers, args.duration, args.step, seed=args.seed)
+
+    modes = {"off": [False], "on": [True], "both": [False, True]}[args.reload]
+    runs = []
+    for reload in modes:
+        print(f"[storm] trace={args.trace} events={len(trace)} reload={reload}", file=sys.stderr)
+        runs.append(await _run_once(args, config, trace, reload))
+
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "log_level")}
+    return {"meta": _meta(params), "runs": runs}
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger(f"custom_components.{DOMAIN}").setLevel(args.log_level.upper())
+
+    report = asyncio.run(_async_main(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Бенчмарки Zone Manager на синтетических зданиях.
+
+Зачем:
+- Измерять горячие пути интеграции на размерах от 10 до 50k зон.
+- Сравнивать релизы между собой: результат — JSON (stdout или --output).
+
+Запуск (из корня репозитория, нужен установленный homeassistant):
+    python -m benchmarks.run_benchmarks --sizes 10,1000,50000 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from custom_components.zone_manager.const import DOMAIN
+from custom_components.zone_manager.registry import get_registry
+from custom_components.zone_manager.services import async_register_services
+from custom_components.zone_manager.storage import _normalize_and_validate
+from custom_components.zone_manager.websocket_api import _async_entities_for_area, _validate_space_for_save
+
+from .harness import (
+    async_start_test_hass,
+    async_stop_test_hass,
+    make_storage,
+    populate_registries,
+    write_config_file,
+)
+from .synthetic import BuildingSpec, generate_config, iter_entities, sample_sensor_ids
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 50000)
+
+ALL_OPS = (
+    "normalize_and_validate",
+    "validate_space_for_save",
+    "async_load",
+    "registry_lookup",
+    "get_sensor_config",
+    "entities_for_area_all",
+    "entities_for_area_one",
+    "async_save_incremental",
+    "async_save_full",
+    "space_delete_recreate",
+)
+
+
+async def _measure(fn: Callable[[], Any | Awaitable[Any]], repeat: int, calls_per_run: int = 1) -> dict[str, Any]:
+    """Прогнать fn repeat раз (плюс 1 прогрев) и вернуть статистику по времени прогона."""
+    times: list[float] = []
+    for run in range(repeat + 1):
+        start = time.perf_counter()
+        res = fn()
+        if inspect.isawaitable(res):
+            await res
+        elapsed = time.perf_counter() - start
+        if run > 0:
+            times.append(elapsed)
+
+    times.sort()
+    median = statistics.median(times)
+    return {
+        "runs": repeat,
+        "calls_per_run": calls_per_run,
+        "min_s": times[0],
+        "median_s": median,
+        "mean_s": statistics.fmean(times),
+        "max_s": times[-1],
+        "per_call_us": median / calls_per_run * 1e6,
+    }
+
+
+async def _bench_size(spec: BuildingSpec, ops: set[str], repeat: int, lookups: int) -> list[dict[str, Any]]:
+    """Все измерения для одного размера здания."""
+    config = generate_config(spec)
+    first_space_name = next(iter(config["spaces"]))
+    keys = sample_sensor_ids(config, lookups)
+    # ~10% промахов: реальные автоматизации дёргают сервис и для датчиков без зоны
+    for i in range(0, len(keys), 10):
+        keys[i] = f"sensor.bench_missing_{i}"
+
+    results: list[dict[str, Any]] = []
+
+    def record(op: str, stats: dict[str, Any]) -> None:
+        results.append({"op": op, "zones": spec.zones, "spaces": spec.spaces, **stats})
+
+    with tempfile.TemporaryDirectory(prefix="zone_manager_bench_") as config_dir:
+        hass = await async_start_test_hass(config_dir)
+        try:
+            path = write_config_file(config_dir, config)
+            storage = make_storage(hass, path)
+            await storage.async_load()
+            registry = get_registry(hass)
+            registry.async_add(storage)
+
+            if "normalize_and_validate" in ops:
+                record("normalize_and_validate", await _measure(lambda: _normalize_and_validate(config), repeat))
+
+            if "validate_space_for_save" in ops:
+                space_obj = storage.get_space(first_space_name)
+                record("validate_space_for_save", await _measure(lambda: _validate_space_for_save(space_obj), repeat))
+
+            if "async_load" in ops:
+                record("async_load", await _measure(storage.async_load, repeat))
+
+            if "registry_lookup" in ops:
+                def lookup_all() -> None:
+                    for key in keys:
+                        registry.lookup(key)
+
+                record("registry_lookup", await _measure(lookup_all, repeat, len(keys)))
+
+            if "get_sensor_config" in ops:
+                await async_register_services(hass)
+
+                async def call_all() -> None:
+                    for key in keys:
+                        await hass.services.async_call(
+                            DOMAIN,
+                            "get_sensor_config",
+                            {"entity_id": key},
+                            blocking=True,
+                            return_response=True,
+                        )
+
+                record("get_sensor_config", await _measure(call_all, repeat, len(keys)))
+
+            if {"entities_for_area_all", "entities_for_area_one"} & ops:
+                populate_registries(hass, iter_entities(config))
+                if "entities_for_area_all" in ops:
+                    record(
+                        "entities_for_area_all",
+                        await _measure(lambda: _async_entities_for_area(hass, None, {"sensor", "light"}), repeat),
+                    )
+                if "entities_for_area_one" in ops:
+                    from homeassistant.helpers import area_registry as ar
+
+                    area = ar.async_get(hass).async_get_area_by_name(first_space_name)
+                    record(
+                        "entities_for_area_one",
+                        await _measure(lambda: _async_entities_for_area(hass, area.id, {"sensor", "light"}), repeat),
+                    )
+
+            if "async_save_incremental" in ops:
+                async def save_one() -> None:
+                    # Правка одного пространства, как после WS space_save
+                    storage.save_space(first_space_name, storage.get_space(first_space_name))
+                    await storage.async_save()
+
+                record("async_save_incremental", await _measure(save_one, repeat))
+
+            if "async_save_full" in ops:
+                async def save_cold() -> None:
+                    storage._space_cache.clear()
+                    await storage.async_save()
+
+                record("async_save_full", await _measure(save_cold, repeat))
+
+            if "space_delete_recreate" in ops:
+                space_obj = storage.get_space(first_space_name)
+
+                async def delete_recreate() -> None:
+                    # WS space_delete -> space_create -> space_save (корректность — tests/test_storage_registry.py)
+                    storage.delete_space(first_space_name)
+                    await storage.async_save()
+                    storage.create_space(first_space_name)
+                    storage.save_space(first_space_name, space_obj)
+                    await storage.async_save()
+
+                record("space_delete_recreate", await _measure(delete_recreate, repeat))
+        finally:
+            await async_stop_test_hass(hass)
+
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(params: dict[str, Any]) -> dict[str, Any]:
+    """Окружение прогона: версии и параметры (чтобы отчёты разных релизов были сопоставимы)."""
+    from homeassistant.const import __version__ as ha_version
+
+    manifest = json.loads((ROOT / "custom_components" / DOMAIN / "manifest.json").read_text(encoding="utf-8"))
+    return {
+        "integration_version": manifest.get("version"),
+        "git_revision": _git_revision(),
+        "homeassistant_version": ha_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "params": params,
+    }
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Zone Manager benchmarks (JSON output)")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        type=lambda v: [int(x) for x in v.split(",") if x.strip()],
+                        help="Total zone counts, comma separated")
+    parser.add_argument("--zones-per-space", type=int, default=50)
+    parser.add_argument("--fanout", type=int, default=4, help="Neighbors per zone")
+    parser.add_argument("--light-groups", type=int, default=10, help="Light groups per space")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=1000, help="Lookups per run for lookup ops")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ops", default=",".join(ALL_OPS), help="Subset of ops, comma separated")
+    parser.add_argument("--output", help="Write JSON to file instead of stdout")
+    parser.add_argument("--log-level", default="ERROR", help="Log level for the integration during runs")
+    return parser.parse_args(argv)
+
+
+async def _async_main(args: argparse.Namespace) -> dict[str, Any]:
+    ops = {op.strip() for op in args.ops.split(",") if op.strip()}
+    unknown = ops - set(ALL_OPS)
+    if unknown:
+        raise SystemExit(f"Unknown ops: {', '.join(sorted(unknown))}")
+
+    results: list[dict[str, Any]] = []
+    for size in args.sizes:
+        spec = BuildingSpec(
+            zones=size,
+            zones_per_space=args.zones_per_space,
+            fanout=args.fanout,
+            light_groups_per_space=args.light_groups,
+            seed=args.seed,
+        )
+        print(f"[bench] zones={size} spaces={spec.spaces}", file=sys.stderr)
+        results.extend(await _bench_size(spec, ops, args.repeat, args.lookups))
+
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "log_level")}
+    return {"meta": _meta(params), "results": results}
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger(f"custom_components.{DOMAIN}").setLevel(args.log_level.upper())
+
+    report = asyncio.run(_async_main(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Генераторы синтетических зданий для бенчмарков Zone Manager.
+
+Зачем:
+- Получать конфиг zone_manager.json произвольного размера без реального объекта.
+- Параметры: число пространств, зон на пространство, fan-out соседей и число групп света.
+- Трассы событий движения (пуассоновские всплески, проходы по коридорам) для нагрузочных тестов.
+- Генерация детерминирована (seed), чтобы результаты разных релизов были сравнимы.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Any
+
+DATA_VERSION = "v0.1"
+
+
+@dataclass(frozen=True)
+class BuildingSpec:
+    """Параметры синтетического здания."""
+
+    zones: int
+    zones_per_space: int = 50
+    fanout: int = 4
+    light_groups_per_space: int = 10
+    seed: int = 1
+
+    @property
+    def spaces(self) -> int:
+        return max(1, math.ceil(self.zones / max(1, self.zones_per_space)))
+
+
+def sensor_id(space_idx: int, zone_idx: int) -> str:
+    """entity_id датчика движения зоны."""
+    return f"sensor.bench_ms_{space_idx}_{zone_idx}_state"
+
+
+def light_group_id(space_idx: int, group_idx: int) -> str:
+    """entity_id группы света пространства."""
+    return f"light.bench_group_{space_idx}_{group_idx}"
+
+
+def space_name(space_idx: int) -> str:
+    return f"Space {space_idx:05d}"
+
+
+def generate_config(spec: BuildingSpec) -> dict[str, Any]:
+    """Сгенерировать конфиг в формате zone_manager.json.
+
+    Соседи выбираются внутри своего пространства; длины neighbors / far_neighbors /
+    neighbor_groups совпадают, как требует валидация space_save.
+    """
+    rnd = random.Random(spec.seed)
+    spaces: dict[str, Any] = {}
+
+    remaining = spec.zones
+    for s_idx in range(spec.spaces):
+        count = min(spec.zones_per_space, remaining)
+        remaining -= count
+        sensors = [sensor_id(s_idx, z_idx) for z_idx in range(count)]
+        groups = [light_group_id(s_idx, g_idx) for g_idx in range(max(1, spec.light_groups_per_space))]
+
+        zones: dict[str, Any] = {}
+        for z_idx, key in enumerate(sensors):
+            others = sensors[:z_idx] + sensors[z_idx + 1:]
+            k = min(spec.fanout, len(others))
+            neighbors = rnd.sample(others, k)
+            far_neighbors = rnd.sample(others, k)
+            zones[key] = {
+                "neighbors": neighbors,
+                "far_neighbors": far_neighbors,
+                "neighbor_groups": [rnd.choice(groups) for _ in range(k)],
+                "light_group": [groups[z_idx % len(groups)]],
+            }
+        spaces[space_name(s_idx)] = {"zones": zones}
+
+    return {"version": DATA_VERSION, "spaces": spaces}
+
+
+def iter_entities(config: dict[str, Any]) -> list[tuple[str, str]]:
+    """Список (entity_id, area_name) всех датчиков и групп света конфига.
+
+    Area = имя пространства: так _async_entities_for_area фильтрует реалистичную долю registry.
+    """
+    out: list[tuple[str, str]] = []
+    for name, space_obj in config.get("spaces", {}).items():
+        groups: set[str] = set()
+        for key, zone in space_obj.get("zones", {}).items():
+            out.append((key, name))
+            groups.update(zone.get("light_group", []))
+            groups.update(zone.get("neighbor_groups", []))
+        out.extend((group, name) for group in sorted(groups))
+    return out
+
+
+def sample_sensor_ids(config: dict[str, Any], count: int, seed: int = 2) -> list[str]:
+    """Случайная выборка существующих ключей зон (для lookup-бенчмарков)."""
+    keys = [key for space_obj in config.get("spaces", {}).values() for key in space_obj.get("zones", {})]
+    if not keys:
+        return []
+    rnd = random.Random(seed)
+    return [rnd.choice(keys) for _ in range(count)]
+
+
+# ---------------------------
+# Трассы событий движения
+# ---------------------------
+
+def poisson_trace(
+    config: dict[str, Any],
+    rate: float,
+    duration: float,
+    burst_factor: float = 5.0,
+    burst_every: float = 10.0,
+    burst_len: float = 2.0,
+    seed: int = 3,
+) -> list[tuple[float, str]]:
+    """Пуассоновский поток срабатываний со всплесками.
+
+    rate — событий/с в спокойный период; в первые burst_len секунд каждых burst_every
+    интенсивность умножается на burst_factor. Датчик выбирается равномерно.
+    Возвращает отсортированный список (смещение_с, entity_id).
+    """
+    keys = [key for space_obj in config.get("spaces", {}).values() for key in space_obj.get("zones", {})]
+    if not keys or rate <= 0:
+        return []
+
+    rnd = random.Random(seed)
+    out: list[tuple[float, str]] = []
+    t = 0.0
+    while True:
+        in_burst = burst_every > 0 and (t % burst_every) < burst_len
+        t += rnd.expovariate(rate * (burst_factor if in_burst else 1.0))
+        if t >= duration:
+            break
+        out.append((t, rnd.choice(keys)))
+    return out
+
+
+def corridor_trace(
+    config: dict[str, Any],
+    walkers: int,
+    duration: float,
+    step: float = 1.5,
+    seed: int = 4,
+) -> list[tuple[float, str]]:
+    """Люди, идущие по графу соседей: каждый шаг — срабатывание датчика следующей зоны.
+
+    Каждый walker стартует в случайной зоне и через step (±30%) переходит в случайного
+    соседа из neighbors; если соседей нет — в случайную зону того же пространства.
+    """
+    zones_by_key: dict[str, dict[str, Any]] = {}
+    space_keys: dict[str, list[str]] = {}
+    for name, space_obj in config.get("spaces", {}).items():
+        zones = space_obj.get("zones", {})
+        zones_by_key.update(zones)
+        for key in zones:
+            space_keys[key] = list(zones)
+    if not zones_by_key:
+        return []
+
+    rnd = random.Random(seed)
+    all_keys = list(zones_by_key)
+    out: list[tuple[float, str]] = []
+    for _ in range(walkers):
+        t = rnd.uniform(0, step)
+        current = rnd.choice(all_keys)
+        while t < duration:
+            out.append((t, current))
+            neighbors = [n for n in zones_by_key[current].get("neighbors", []) if n in zones_by_key]
+            current = rnd.choice(neighbors or space_keys[current])
+            t += step * rnd.uniform(0.7, 1.3)
+
+    out.sort()
+    return out
@@ -2,26 +2,56 @@
 
 Зачем нужен этот файл:
 - Точка входа интеграции.
-- Инициализирует хранилище, WebSocket API, сервисы и статический путь для frontend.
+- Регистрирует WebSocket API и сервисы один раз на домен (async_setup).
+- Для каждой config entry (свой JSON-файл) загружает хранилище и подключает его к registry.
+- Подключает опциональные платформы (сенсоры метрик, сущности зон) по опциям entry.
+- По опции держит рядом с JSON плоский lookup-файл для внешних потребителей (lookup_export.py).
 """
 from __future__ import annotations
 
 import logging
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, CONF_CONFIG_PATH, DEFAULT_CONFIG_FILENAME
+from .const import (
+    DOMAIN,
+    CONF_CONFIG_PATH,
+    CONF_METRICS_SENSORS,
+    CONF_ZONE_ENTITIES,
+    CONF_LOOKUP_EXPORT,
+    DATA_PLATFORMS,
+    DEFAULT_CONFIG_FILENAME,
+)
+from .lookup_export import LookupExporter
+from .metrics import get_metrics
+from .registry import get_registry
 from .storage import ZoneManagerStorage
 from .websocket_api import async_register_ws
 from .services import async_register_services
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _enabled_platforms(entry: ConfigEntry) -> list[Platform]:
+    """Платформы, включённые в опциях entry."""
+    platforms: list[Platform] = []
+    if entry.options.get(CONF_METRICS_SENSORS, False) or entry.options.get(CONF_ZONE_ENTITIES, False):
+        platforms.append(Platform.SENSOR)
+    return platforms
+
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
-    """Базовая подготовка (редко используется)."""
+    """Базовая подготовка: WS-команды и сервисы общие для всех entry."""
     _LOGGER.debug("async_setup called")
     hass.data.setdefault(DOMAIN, {})
+
+    # Регистрируем WebSocket команды ЯВНО (один раз: маршрутизация по entry — в registry)
+    await async_register_ws(hass)
+
+    # Регистрируем сервисы (services.yaml обязателен)
+    await async_register_services(hass)
     return True
 
 
@@ -44,17 +74,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         data[CONF_CONFIG_PATH] = default_path
         hass.config_entries.async_update_entry(entry, data=data)
     # --- /FIX ---
-    storage = ZoneManagerStorage(hass=hass, entry=entry)
+    storage = ZoneManagerStorage(hass=hass, entry=entry, metrics=get_metrics(hass))
     await storage.async_load()  # важно: await на async функции :contentReference[oaicite:2]{index=2}
 
-    # Сохраняем storage в hass.data
+    # Сохраняем storage в hass.data и подключаем к общему индексу
     hass.data[DOMAIN][entry.entry_id] = storage
+    get_registry(hass).async_add(storage)
 
-    # Регистрируем WebSocket команды ЯВНО :contentReference[oaicite:3]{index=3}
-    await async_register_ws(hass, storage)
+    if entry.options.get(CONF_LOOKUP_EXPORT, False):
+        exporter = LookupExporter(hass, storage)
+        exporter.async_start()
+        entry.async_on_unload(exporter.async_stop)
 
-    # Регистрируем сервисы (services.yaml обязателен) :contentReference[oaicite:4]{index=4}
-    await async_register_services(hass, storage)
+    platforms = _enabled_platforms(entry)
+    if platforms:
+        await hass.config_entries.async_forward_entry_setups(entry, platforms)
+    hass.data.setdefault(DATA_PLATFORMS, {})[entry.entry_id] = platforms
+
+    # Изменение опций -> перезагрузка entry (платформы подключатся заново)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     _LOGGER.info("Zone Manager setup complete (entry_id=%s)", entry.entry_id)
     return True
@@ -64,9 +102,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Выгрузка интеграции."""
     _LOGGER.info("Unloading Zone Manager entry_id=%s", entry.entry_id)
 
+    platforms = hass.data.get(DATA_PLATFORMS, {}).get(entry.entry_id, [])
+    if platforms and not await hass.config_entries.async_unload_platforms(entry, platforms):
+        return False
+    hass.data.get(DATA_PLATFORMS, {}).pop(entry.entry_id, None)
+    get_registry(hass).async_remove(entry.entry_id)
+
     storage: ZoneManagerStorage | None = hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
 
     if storage is not None:
         await storage.async_close()
 
     return True
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Опции изменились — перезагружаем entry."""
+    _LOGGER.info("Options updated, reloading entry_id=%s", entry.entry_id)
+    await hass.config_entries.async_reload(entry.entry_id)
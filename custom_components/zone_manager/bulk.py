@@ -0,0 +1,301 @@
+"""Bulk import / export of zones (сервисы zone_manager.import / zone_manager.export_file).
+
+Зачем:
+- Заводить тысячи зон файлом, а не по одной через карточку и не правкой JSON руками.
+- Формат строки = одна зона: space, zone, neighbors, far_neighbors, neighbor_groups, light_group.
+  CSV: списки — через запятую внутри ячейки (ячейку в кавычках); JSONL: массивы или такие же строки.
+- Файл читается потоком и валидируется в executor порциями по IMPORT_CHUNK_ROWS строк
+  теми же правилами, что space_save (_validate_space_for_save); event loop не блокируется.
+- Изменения применяются в event loop одним сохранением на файл конфигурации и только если ошибок нет.
+  Каждый файл пишется атомарно, но между файлами атомарности нет: если файл не записался,
+  его пространства откатываются в памяти к состоянию до импорта (failed_files в ответе),
+  а уже записанные файлы остаются с изменениями.
+- Экспорт пишется только в /config/zone_manager_exports и только в .csv / .jsonl:
+  сервис не должен уметь перезаписать configuration.yaml, secrets.yaml или сам конфиг зон.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import IO, Any
+
+from homeassistant.core import HomeAssistant, valid_entity_id
+
+from .const import ZONE_FIELDS_LISTS
+from .registry import ZoneManagerRegistry
+from .storage import ZoneManagerStorage, _as_list, _normalize_zone
+from .websocket_api import _validate_space_for_save
+
+FORMAT_AUTO = "auto"
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+# merge: зоны из файла добавляются/перезаписываются, остальные зоны пространства остаются
+# replace: каждое пространство из файла заменяется целиком зонами из файла
+MODE_MERGE = "merge"
+MODE_REPLACE = "replace"
+MODES = (MODE_MERGE, MODE_REPLACE)
+
+IMPORT_CHUNK_ROWS = 1000
+DEFAULT_MAX_ERRORS = 50
+MAX_ERRORS_LIMIT = 1000
+
+EXPORT_COLUMNS = ("space", "zone", *ZONE_FIELDS_LISTS)
+DEFAULT_EXPORT_BASENAME = "zone_manager_export"
+# Подкаталог /config для export_file (относительные пути считаются от него)
+EXPORT_DIR = "zone_manager_exports"
+
+
+@dataclass
+class ImportResult:
+    """Разобранный импорт: зоны по пространствам + компактный отчёт об ошибках."""
+
+    max_errors: int = DEFAULT_MAX_ERRORS
+    # пространство -> ключ зоны -> нормализованная зона (в порядке строк файла)
+    spaces: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # ключ зоны -> (пространство, номер строки)
+    zones: dict[str, tuple[str, int]] = field(default_factory=dict)
+    rows: int = 0
+    error_count: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, line: int | None, code: str, text: str, **extra: Any) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "code": code, "text": text, **extra})
+
+
+def resolve_path(hass: HomeAssistant, path: str) -> str | None:
+    """Абсолютный путь (относительный — от /config). None — путь вне /config и allowlist."""
+    full = os.path.realpath(path if os.path.isabs(path) else hass.config.path(path))
+    config_dir = os.path.realpath(hass.config.path())
+    if full.startswith(config_dir + os.sep) or hass.config.is_allowed_path(full):
+        return full
+    return None
+
+
+def resolve_export_path(hass: HomeAssistant, path: str | None, fmt: str, protected: set[str]) -> str:
+    """Абсолютный путь для export_file.
+
+    Только внутри /config/EXPORT_DIR и только с расширением формата (.csv / .jsonl);
+    protected — пути загруженных конфигов (и их lookup-файлов), их перезаписывать нельзя.
+    Ошибка — ValueError с кодом для ответа сервиса.
+    """
+    export_dir = os.path.realpath(hass.config.path(EXPORT_DIR))
+    path = path or f"{DEFAULT_EXPORT_BASENAME}.{fmt}"
+    full = os.path.realpath(path if os.path.isabs(path) else os.path.join(export_dir, path))
+    if not full.startswith(export_dir + os.sep):
+        raise ValueError("path_not_allowed")
+    if os.path.splitext(full)[1].lower() != f".{fmt}":
+        raise ValueError("invalid_extension")
+    if full in {os.path.realpath(p) for p in protected}:
+        raise ValueError("config_path")
+    return full
+
+
+def detect_format(fmt: str, path: str | None) -> str:
+    if fmt != FORMAT_AUTO:
+        return fmt
+    if path and path.lower().endswith((".jsonl", ".ndjson", ".json")):
+        return FORMAT_JSONL
+    return FORMAT_CSV
+
+
+# ---------------------------
+# Импорт (executor)
+# ---------------------------
+
+def _iter_rows(stream: IO[str], fmt: str) -> Iterator[tuple[int, dict[str, Any] | None, str | None]]:
+    """(номер строки, строка, ошибка разбора) — по одной, без чтения файла целиком."""
+    if fmt == FORMAT_CSV:
+        reader = csv.DictReader(stream)
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        if "space" not in header or "zone" not in header:
+            yield 1, None, "CSV header must contain 'space' and 'zone' columns"
+            return
+        reader.fieldnames = header
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as err:
+            yield line_no, None, f"Invalid JSON: {err}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "Row must be a JSON object"
+            continue
+        yield line_no, row, None
+
+
+def parse_import(stream: IO[str], fmt: str, max_errors: int) -> ImportResult:
+    """Прочитать и провалидировать импорт порциями (вызывается в executor)."""
+    result = ImportResult(max_errors=max_errors)
+    chunk: list[tuple[int, dict[str, Any]]] = []
+    for line, row, parse_error in _iter_rows(stream, fmt):
+        if parse_error is not None:
+            result.add_error(line, "parse_error", parse_error)
+            continue
+        result.rows += 1
+        chunk.append((line, row))
+        if len(chunk) >= IMPORT_CHUNK_ROWS:
+            _validate_chunk(result, chunk)
+            chunk = []
+    if chunk:
+        _validate_chunk(result, chunk)
+    return result
+
+
+def parse_import_file(path: str, fmt: str, max_errors: int) -> ImportResult:
+    # utf-8-sig: CSV из Excel начинается с BOM
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        return parse_import(stream, fmt, max_errors)
+
+
+def parse_import_text(text: str, fmt: str, max_errors: int) -> ImportResult:
+    return parse_import(io.StringIO(text, newline=""), fmt, max_errors)
+
+
+def _validate_chunk(result: ImportResult, chunk: list[tuple[int, dict[str, Any]]]) -> None:
+    by_space: dict[str, dict[str, Any]] = {}
+    for line, row in chunk:
+        space = str(row.get("space") or "").strip()
+        zone_key = str(row.get("zone") or "").strip()
+        if not space:
+            result.add_error(line, "missing_space", "Column 'space' is empty", zone=zone_key)
+            continue
+        if not valid_entity_id(zone_key):
+            result.add_error(line, "invalid_entity_id", "Zone key must be a valid entity_id", space=space,
+                             zone=zone_key, field="zone_key")
+            continue
+        previous = result.zones.get(zone_key)
+        if previous is not None:
+            result.add_error(line, "duplicate_row", f"Zone already defined on line {previous[1]}", space=space,
+                             zone=zone_key, field="zone_key")
+            continue
+        result.zones[zone_key] = (space, line)
+
+        zone = _normalize_zone({fld: _as_list(row.get(fld)) for fld in ZONE_FIELDS_LISTS})
+        for fld in ZONE_FIELDS_LISTS:
+            for idx, value in enumerate(zone[fld]):
+                if not valid_entity_id(value):
+                    result.add_error(line, "invalid_entity_id", "Invalid entity_id", space=space, zone=zone_key,
+                                     field=fld, index=idx)
+        by_space.setdefault(space, {})[zone_key] = zone
+
+    # Правила space_save — по зоне, поэтому одной проверки на пространство порции достаточно
+    for space, zones in by_space.items():
+        for err in _validate_space_for_save({"zones": zones}):
+            line = result.zones.get(err.get("zone", ""), (space, None))[1]
+            code = err.pop("code")
+            text = err.pop("text")
+            result.add_error(line, code, text, space=space, **err)
+        result.spaces.setdefault(space, {}).update(zones)
+
+
+# ---------------------------
+# Импорт (event loop)
+# ---------------------------
+
+def check_against_config(registry: ZoneManagerRegistry, result: ImportResult, mode: str) -> None:
+    """Зона не должна остаться в другом пространстве (иначе один датчик окажется в двух местах)."""
+    for zone_key, (space, line) in result.zones.items():
+        _storage, current_space, _zone = registry.lookup(zone_key)
+        if current_space is None or current_space == space:
+            continue
+        if mode == MODE_REPLACE and current_space in result.spaces:
+            continue  # старое пространство заменяется целиком — зона из него уйдёт
+        result.add_error(line, "zone_in_other_space", f"Zone already exists in space '{current_space}'",
+                         space=space, zone=zone_key, field="zone_key")
+
+
+async def async_apply_import(
+    registry: ZoneManagerRegistry,
+    result: ImportResult,
+    mode: str,
+    entry_id: str | None,
+) -> dict[str, Any]:
+    """Применить импорт: save_space по пространствам и одно async_save на каждый затронутый файл.
+
+    failed_files — файлы, которые не удалось записать; их пространства откатываются в памяти
+    к состоянию до импорта (иначе несохранённый импорт попал бы на диск со следующим сохранением).
+    """
+    default_storage = registry.get_storage(entry_id)
+    touched: dict[str, ZoneManagerStorage] = {}
+    # entry_id -> пространство -> объект до импорта (None — пространство создано импортом)
+    previous: dict[str, dict[str, dict[str, Any] | None]] = {}
+    created = 0
+    for space, zones in result.spaces.items():
+        storage = registry.storage_for_space(space)
+        if storage is None:
+            if default_storage is None:
+                raise ValueError("entry_not_found")
+            storage = default_storage
+            created += 1
+            new_zones = dict(zones)
+        elif mode == MODE_MERGE:
+            new_zones = {**(storage.get_space(space) or {}).get("zones", {}), **zones}
+        else:
+            new_zones = dict(zones)
+        previous.setdefault(storage.entry.entry_id, {}).setdefault(space, storage.get_space(space))
+        storage.save_space(space, {"zones": new_zones})
+        touched[storage.entry.entry_id] = storage
+
+    storages = list(touched.values())
+    written = await asyncio.gather(*(storage.async_save() for storage in storages))
+    failed: list[str] = []
+    for storage, ok in zip(storages, written):
+        if ok:
+            continue
+        failed.append(storage.config_path)
+        for space, space_obj in previous[storage.entry.entry_id].items():
+            if space_obj is None:
+                storage.delete_space(space)
+            else:
+                storage.save_space(space, space_obj)
+    return {"created_spaces": created, "files": len(touched), "failed_files": failed}
+
+
+# ---------------------------
+# Экспорт (executor)
+# ---------------------------
+
+def write_export(path: str, fmt: str, spaces: list[tuple[str, dict[str, Any]]]) -> int:
+    """Записать зоны потоком во временный файл и атомарно подменить. Возвращает число строк."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".zone_manager_export_", dir=directory)
+    rows = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f) if fmt == FORMAT_CSV else None
+            if writer is not None:
+                writer.writerow(EXPORT_COLUMNS)
+            for space, space_obj in spaces:
+                for zone_key, zone in (space_obj.get("zones") or {}).items():
+                    lists = [_as_list(zone.get(fld)) for fld in ZONE_FIELDS_LISTS]
+                    if writer is not None:
+                        writer.writerow([space, zone_key, *(", ".join(values) for values in lists)])
+                    else:
+                        f.write(json.dumps(dict(zip(EXPORT_COLUMNS, [space, zone_key, *lists])), ensure_ascii=False))
+                        f.write("\n")
+                    rows += 1
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
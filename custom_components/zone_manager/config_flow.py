@@ -3,18 +3,21 @@
 Зачем:
 - Чтобы интеграция ставилась/настраивалась через UI HA.
 - В v0.1 настраиваем только путь JSON (по умолчанию zone_manager.json в /config).
+- Несколько entry = несколько JSON-файлов (например, по корпусам); поиск видит их все.
+- Options flow: опциональные платформы (сенсоры метрик, сущности зон).
 """
 
 from __future__ import annotations
 
 import logging
+import os
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN, CONF_CONFIG_PATH, DEFAULT_CONFIG_FILENAME
+from .const import DOMAIN, CONF_CONFIG_PATH, CONF_METRICS_SENSORS, CONF_ZONE_ENTITIES, CONF_LOOKUP_EXPORT, DEFAULT_CONFIG_FILENAME
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,6 +32,12 @@ class ZoneManagerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        """Options flow для уже созданной интеграции."""
+        return ZoneManagerOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input: dict | None = None) -> FlowResult:
         """Шаг добавления интеграции пользователем."""
         errors: dict[str, str] = {}
@@ -38,13 +47,18 @@ class ZoneManagerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             if not config_path:
                 errors["base"] = "invalid_config_path"
             else:
-                # В v0.1 допускаем только один инстанс интеграции
-                await self.async_set_unique_id(DOMAIN)
+                # Один и тот же файл двумя entry не подключаем
+                self._async_abort_entries_match({CONF_CONFIG_PATH: config_path})
+                await self.async_set_unique_id(config_path)
                 self._abort_if_unique_id_configured()
 
+                title = "Zone Manager"
+                if self._async_current_entries():
+                    title = f"Zone Manager ({os.path.basename(config_path)})"
+
                 _LOGGER.info("Creating config entry with config_path=%s", config_path)
                 return self.async_create_entry(
-                    title="Zone Manager",
+                    title=title,
                     data={CONF_CONFIG_PATH: config_path},
                 )
 
@@ -59,3 +73,36 @@ class ZoneManagerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=schema,
             errors=errors,
         )
+
+
+class ZoneManagerOptionsFlow(config_entries.OptionsFlow):
+    """Опции Zone Manager (после изменения entry перезагружается)."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict | None = None) -> FlowResult:
+        """Единственный шаг опций."""
+        if user_input is not None:
+            _LOGGER.info("Updating options: %s", user_input)
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_METRICS_SENSORS,
+                    default=options.get(CONF_METRICS_SENSORS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_ZONE_ENTITIES,
+                    default=options.get(CONF_ZONE_ENTITIES, False),
+                ): bool,
+                vol.Optional(
+                    CONF_LOOKUP_EXPORT,
+                    default=options.get(CONF_LOOKUP_EXPORT, False),
+                ): bool,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema)
@@ -6,6 +6,20 @@ CONF_CONFIG_PATH = "config_path"
 
 DEFAULT_CONFIG_FILENAME = "zone_manager.json"
 
+# Опции config entry
+CONF_METRICS_SENSORS = "metrics_sensors"
+CONF_ZONE_ENTITIES = "zone_entities"
+CONF_LOOKUP_EXPORT = "lookup_export"
+
+# Ключи hass.data вне hass.data[DOMAIN] (там лежат storage по entry_id)
+DATA_METRICS = f"{DOMAIN}_metrics"
+# entry_id -> подключённые платформы (опции к моменту unload уже могут быть новыми)
+DATA_PLATFORMS = f"{DOMAIN}_platforms"
+# Активная сессия profile_start (profiler.ProfileSession)
+DATA_PROFILER = f"{DOMAIN}_profiler"
+# Загруженные storage всех entry + объединённый индекс зон (registry.ZoneManagerRegistry)
+DATA_REGISTRY = f"{DOMAIN}_registry"
+
 # Версия внутреннего формата JSON (для будущих миграций)
 DATA_VERSION = "v0.1"
 
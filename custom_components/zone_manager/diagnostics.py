@@ -0,0 +1,43 @@
+"""Diagnostics for Zone Manager.
+
+Зачем:
+- «Скачать диагностику» в UI HA: путь к файлу, размер конфига, сводка индекса всех entry
+  и метрики интеграции.
+- Сам конфиг (entity_id датчиков/света) не выгружаем — только счётчики.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .metrics import get_metrics
+from .registry import get_registry
+from .storage import ZoneManagerStorage
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Диагностика config entry."""
+    storage: ZoneManagerStorage | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+
+    config: dict[str, Any] = {"loaded": storage is not None}
+    if storage is not None:
+        spaces = storage.data.get("spaces", {})
+        config.update(
+            {
+                "config_path": storage.config_path,
+                "version": storage.data.get("version"),
+                "spaces": len(spaces),
+                "zones": sum(len((s or {}).get("zones", {}) or {}) for s in spaces.values()),
+            }
+        )
+
+    return {
+        "options": dict(entry.options),
+        "config": config,
+        "registry": get_registry(hass).as_dict(),
+        "metrics": get_metrics(hass).as_dict(),
+    }
@@ -0,0 +1,141 @@
+"""Cached expansion of light groups into member entities (get_sensor_config с expand: true).
+
+Зачем:
+- light_group / neighbor_groups хранят entity_id групп, а off-скрипты раскрывают атрибут entity_id
+  каждой группы шаблонами на каждом срабатывании датчика.
+- Кэш: группа -> плоский список участников (вложенные группы раскрываются рекурсивно, без циклов).
+- Актуальность — одна подписка async_track_state_change_event на набор entity_id: запрошенные
+  из конфига и вложенные группы, которые встретились при раскрытии. Обычные лампы-участники
+  не отслеживаются, поэтому их on/off до кэша не доходят.
+- Кэш сбрасывается при смене состава отслеживаемой группы (атрибут entity_id), её появлении/исчезновении
+  и при изменении конфига (registry, переиндексация). Вместе с кэшем сбрасывается и подписка —
+  набор отслеживаемых entity_id собирается заново при следующих раскрытиях и не растёт без границ.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .metrics import get_metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Защита от патологической вложенности групп
+MAX_GROUP_DEPTH = 8
+
+
+def _members_attr(hass: HomeAssistant, entity_id: str) -> list[str] | None:
+    """Участники из атрибута entity_id (None — сущность не группа или её нет)."""
+    state = hass.states.get(entity_id)
+    if state is None:
+        return None
+    members = state.attributes.get(ATTR_ENTITY_ID)
+    if isinstance(members, str):
+        return [members]
+    if isinstance(members, (list, tuple)):
+        return [m for m in members if isinstance(m, str)]
+    return None
+
+
+class GroupMembershipCache:
+    """entity_id группы -> плоский список участников."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.metrics = get_metrics(hass)
+        self._members: dict[str, list[str]] = {}
+        # Запрошенные entity_id и вложенные группы текущего поколения кэша
+        self._watch: set[str] = set()
+        # Набор, на который сейчас подписаны (одна подписка на весь набор)
+        self._tracked: frozenset[str] = frozenset()
+        self._unsub: Callable[[], None] | None = None
+
+    @callback
+    def async_stop(self) -> None:
+        self.async_invalidate()
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Сбросить кэш и подписку (следующие раскрытия соберут их заново)."""
+        self._members.clear()
+        self._watch.clear()
+        self._set_tracking(frozenset())
+
+    # ---------------------------
+    # Раскрытие
+    # ---------------------------
+    @callback
+    def expand(self, entity_ids: list[str]) -> list[str]:
+        """Плоский список участников для списка групп (без повторов, порядок сохраняется).
+
+        Сущность, которая не является группой, возвращается как есть.
+        """
+        out: list[str] = []
+        seen: set[str] = set()
+        for entity_id in entity_ids:
+            for member in self._expand_one(entity_id):
+                if member not in seen:
+                    seen.add(member)
+                    out.append(member)
+        if len(self._watch) != len(self._tracked):
+            self._set_tracking(frozenset(self._watch))
+        return out
+
+    def _expand_one(self, entity_id: str) -> list[str]:
+        cached = self._members.get(entity_id)
+        if cached is not None:
+            self.metrics.inc("group_cache.hit")
+            return cached
+        self.metrics.inc("group_cache.miss")
+        members: list[str] = []
+        # Сам запрошенный entity_id отслеживаем всегда: он может стать группой позже
+        self._watch.add(entity_id)
+        self._collect(entity_id, members, set(), 0)
+        self._members[entity_id] = members
+        return members
+
+    def _collect(self, entity_id: str, out: list[str], visiting: set[str], depth: int) -> None:
+        if entity_id in visiting:
+            return  # цикл групп: группа уже раскрывается выше по стеку
+        members = _members_attr(self.hass, entity_id)
+        if members is None or depth >= MAX_GROUP_DEPTH:
+            if entity_id not in out:
+                out.append(entity_id)
+            return
+        self._watch.add(entity_id)
+        visiting.add(entity_id)
+        for member in members:
+            self._collect(member, out, visiting, depth + 1)
+        visiting.discard(entity_id)
+
+    def _set_tracking(self, ids: frozenset[str]) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._tracked = ids
+        if ids:
+            self._unsub = async_track_state_change_event(self.hass, ids, self._on_state_changed)
+
+    # ---------------------------
+    # Инвалидация
+    # ---------------------------
+    @callback
+    def _on_state_changed(self, event: Event) -> None:
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        if old_state is not None and new_state is not None:
+            if old_state.attributes.get(ATTR_ENTITY_ID) == new_state.attributes.get(ATTR_ENTITY_ID):
+                return
+        # Смена состава редка, а группа может входить в несколько раскрытий — сбрасываем весь кэш
+        _LOGGER.debug("Group membership changed (%s), clearing cache", event.data.get("entity_id"))
+        self.async_invalidate()
+        self.metrics.inc("group_cache.invalidated")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Сводка для diagnostics."""
+        return {"cached_groups": len(self._members), "tracked_entities": len(self._tracked)}
@@ -0,0 +1,173 @@
+"""Compiled flat lookup file for external consumers (опция «Lookup-файл для внешних потребителей»).
+
+Зачем:
+- Node-RED, AppDaemon, скрипты вне HA хотят «entity_id датчика -> конфиг зоны» без обхода
+  пространств и без вызова сервиса get_sensor_config.
+- Рядом с исходным JSON пишется <имя>.lookup.json: плоский словарь по entity_id датчика
+  с теми же нормализованными полями, что возвращает get_sensor_config (_zone_config),
+  и заголовком format / format_version / source / data_version.
+- Пересборка инкрементальная: по уведомлениям storage перекодируются только изменённые
+  пространства (кэш строк, как _space_cache в storage), файл не пишется, если текст не изменился.
+- Запись — в executor, атомарно (tmp -> replace), без backup: файл всегда можно пересобрать.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .storage import ZoneManagerStorage, _zone_config
+
+_LOGGER = logging.getLogger(__name__)
+
+LOOKUP_FORMAT = "zone_manager.lookup"
+# Увеличивать при несовместимом изменении структуры файла
+LOOKUP_FORMAT_VERSION = 1
+LOOKUP_SUFFIX = ".lookup.json"
+
+
+def lookup_path(config_path: str) -> str:
+    """/config/zone_manager.json -> /config/zone_manager.lookup.json"""
+    base, ext = os.path.splitext(config_path)
+    return f"{base if ext.lower() == '.json' else config_path}{LOOKUP_SUFFIX}"
+
+
+def _encode_space_lines(space_name: str, space_obj: dict[str, Any]) -> list[tuple[str, str]]:
+    """(ключ зоны, строка `"entity_id": {...}`) — одна зона на строку, чтобы diff файла был читаемым."""
+    zones = space_obj.get("zones") or {}
+    if not isinstance(zones, dict):
+        return []
+    return [
+        (
+            zone_key,
+            f"    {json.dumps(zone_key, ensure_ascii=False)}: "
+            f"{json.dumps(_zone_config(space_name, zone), ensure_ascii=False)}",
+        )
+        for zone_key, zone in zones.items()
+        if isinstance(zone_key, str) and zone_key and isinstance(zone, dict)
+    ]
+
+
+def _render_lookup(header: dict[str, Any], lines: list[str]) -> str:
+    head = ",\n".join(f"  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}" for k, v in header.items())
+    if not lines:
+        return f'{{\n{head},\n  "zones": {{}}\n}}\n'
+    return f'{{\n{head},\n  "zones": {{\n' + ",\n".join(lines) + "\n  }\n}\n"
+
+
+def _write_if_changed(path: str, text: str, check_disk: bool) -> bool:
+    """Записать атомарно. check_disk — сначала сравнить с файлом на диске (первая запись после старта)."""
+    if check_disk:
+        try:
+            with open(path, encoding="utf-8", newline="") as f:
+                if f.read() == text:
+                    return False
+        except OSError:
+            pass
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".zone_manager_lookup_", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+class LookupExporter:
+    """Поддерживает lookup-файл одной entry в актуальном состоянии."""
+
+    def __init__(self, hass: HomeAssistant, storage: ZoneManagerStorage) -> None:
+        self.hass = hass
+        self.storage = storage
+        self.metrics = storage.metrics
+        self.path = lookup_path(storage.config_path)
+        # пространство -> закодированные строки его зон
+        self._space_lines: dict[str, list[tuple[str, str]]] = {}
+        # Текст, который сейчас в файле (None — ещё не знаем, сравниваем с диском)
+        self._written: str | None = None
+        self._pending: str | None = None
+        self._task: asyncio.Task | None = None
+        self._unsub: Callable[[], None] | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Подписаться на storage и собрать файл по текущим данным."""
+        self._unsub = self.storage.async_add_listener(self._on_storage_changed)
+        self._on_storage_changed(None)
+
+    async def async_stop(self) -> None:
+        """Отписаться и дождаться записи, которая уже идёт."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._task is not None:
+            await self._task
+
+    @callback
+    def _on_storage_changed(self, changed: set[str] | None) -> None:
+        spaces: dict[str, Any] = self.storage.data.get("spaces", {})
+        if changed is None:
+            self._space_lines.clear()
+            changed = set(spaces)
+        for name in changed:
+            space_obj = spaces.get(name)
+            if isinstance(space_obj, dict):
+                self._space_lines[name] = _encode_space_lines(name, space_obj)
+            else:
+                self._space_lines.pop(name, None)
+
+        text = self._render()
+        if text == (self._pending if self._pending is not None else self._written):
+            self.metrics.inc("lookup_export.skipped")
+            return
+        self._pending = text
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(self._async_write(), f"zone_manager lookup {self.path}")
+
+    def _render(self) -> str:
+        # Дубли ключей внутри файла: действует пространство, первое по алфавиту (как в registry)
+        seen: set[str] = set()
+        lines: list[str] = []
+        for name in sorted(self._space_lines):
+            for zone_key, line in self._space_lines[name]:
+                if zone_key not in seen:
+                    seen.add(zone_key)
+                    lines.append(line)
+        header = {
+            "format": LOOKUP_FORMAT,
+            "format_version": LOOKUP_FORMAT_VERSION,
+            "source": os.path.basename(self.storage.config_path),
+            "data_version": self.storage.data.get("version"),
+        }
+        return _render_lookup(header, lines)
+
+    async def _async_write(self) -> None:
+        """Писать последнюю версию текста, пока во время записи приходят новые."""
+        try:
+            while self._pending is not None:
+                text, self._pending = self._pending, None
+                try:
+                    with self.metrics.timer("lookup_export.disk_write"):
+                        written = await self.hass.async_add_executor_job(
+                            _write_if_changed, self.path, text, self._written is None
+                        )
+                except Exception as err:
+                    _LOGGER.exception("Failed to write lookup file %s: %s", self.path, err)
+                    self.metrics.inc("lookup_export.write_errors")
+                    self._written = None  # при следующем изменении сравним с диском заново
+                    continue
+                self._written = text
+                self.metrics.inc("lookup_export.writes" if written else "lookup_export.skipped")
+                _LOGGER.debug("Lookup file %s: %s", self.path, "written" if written else "unchanged")
+        finally:
+            self._task = None
@@ -0,0 +1,177 @@
+"""In-process metrics for Zone Manager.
+
+Зачем:
+- Видеть, как часто и как долго работают get_sensor_config, WS-команды и чтение/запись файла,
+  без INFO-логов на горячем пути.
+- Счётчики (hit/miss, ошибки) + гистограммы задержек с фиксированными корзинами (мс).
+- Реестр один на HA (hass.data[DATA_METRICS]): переживает reload config entry,
+  его читают diagnostics, WS zone_manager/metrics и опциональные sensor-сущности.
+- Таймеры секций — также точка подключения профайлера (profiler.py).
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_METRICS
+
+if TYPE_CHECKING:
+    from .profiler import ProfileSession
+
+_R = TypeVar("_R")
+
+# Верхние границы корзин гистограммы, мс (последняя корзина — всё, что больше)
+LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000,
+)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек: count/sum/min/max + счётчики по корзинам."""
+
+    __slots__ = ("count", "total_ms", "min_ms", "max_ms", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, ms: float) -> None:
+        if self.count == 0 or ms < self.min_ms:
+            self.min_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        self.count += 1
+        self.total_ms += ms
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    def quantile_ms(self, q: float) -> float | None:
+        """Оценка квантиля сверху: верхняя граница корзины (для последней — max)."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                return LATENCY_BUCKETS_MS[idx] if idx < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"le_{b:g}" for b in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "min_ms": round(self.min_ms, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3) if self.count else None,
+            "p50_ms": self.quantile_ms(0.50),
+            "p95_ms": self.quantile_ms(0.95),
+            "p99_ms": self.quantile_ms(0.99),
+            "buckets": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class _Timer:
+    """Контекстный менеджер: меряет блок и пишет в гистограмму (в том числе при исключении).
+
+    Работает и как `with`, и как `async with` (чтобы сочетаться с asyncio.Lock в одной строке).
+    """
+
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics: ZoneManagerMetrics, name: str) -> None:
+        self._metrics = metrics
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> _Timer:
+        profiler = self._metrics.profiler
+        if profiler is not None:
+            profiler.section_enter()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._metrics.observe(self._name, (time.perf_counter() - self._start) * 1000)
+        profiler = self._metrics.profiler
+        if profiler is not None:
+            profiler.section_exit()
+
+    async def __aenter__(self) -> _Timer:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.__exit__(*exc)
+
+
+class ZoneManagerMetrics:
+    """Реестр счётчиков и гистограмм (без блокировок: всё вызывается из event loop)."""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.counters: dict[str, int] = {}
+        self.latency: dict[str, LatencyHistogram] = {}
+        # Активная сессия профилирования (profile_start), иначе None
+        self.profiler: ProfileSession | None = None
+
+    def inc(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, ms: float) -> None:
+        hist = self.latency.get(name)
+        if hist is None:
+            hist = self.latency[name] = LatencyHistogram()
+        hist.observe(ms)
+
+    def timer(self, name: str) -> _Timer:
+        return _Timer(self, name)
+
+    def timed(
+        self, name: str
+    ) -> Callable[[Callable[..., Awaitable[_R]]], Callable[..., Awaitable[_R]]]:
+        """Декоратор для async-обработчиков (сервисы, WS): меряет каждый вызов."""
+
+        def decorator(func: Callable[..., Awaitable[_R]]) -> Callable[..., Awaitable[_R]]:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> _R:
+                with _Timer(self, name):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def counter(self, name: str) -> int:
+        return self.counters.get(name, 0)
+
+    def histogram(self, name: str) -> LatencyHistogram | None:
+        return self.latency.get(name)
+
+    def reset(self) -> None:
+        self.started_at = time.time()
+        self.counters.clear()
+        self.latency.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "counters": dict(sorted(self.counters.items())),
+            "latency": {name: hist.as_dict() for name, hist in sorted(self.latency.items())},
+        }
+
+
+def get_metrics(hass: HomeAssistant) -> ZoneManagerMetrics:
+    """Общий реестр метрик интеграции (создаётся при первом обращении)."""
+    metrics = hass.data.get(DATA_METRICS)
+    if metrics is None:
+        metrics = hass.data[DATA_METRICS] = ZoneManagerMetrics()
+    return metrics
@@ -0,0 +1,233 @@
+"""On-demand profiling for Zone Manager (сервисы profile_start / profile_stop).
+
+Зачем:
+- Профилировать медленные поиски/сохранения в проде без перезапуска HA со своим кодом.
+- cProfile включается, пока хотя бы одна задача (asyncio task) находится внутри секции интеграции
+  (те же секции, что меряет metrics: сервисы, WS-команды, async_load/async_save).
+  Глубина секций считается по задачам: параллельные вызовы не сбивают счётчики друг другу.
+- В потоках executor второй профайлер не запускается: на Python 3.12+ cProfile работает через
+  sys.monitoring на весь интерпретатор, и второй экземпляр падает с ValueError. Файловый I/O
+  виден как время секций storage.disk_read / storage.disk_write (а на 3.12+ и в общем профиле).
+- Сессия ограничена: по времени (не больше MAX_DURATION_S), по числу вызовов
+  и по доле процессорного времени потока event loop, пока cProfile включён (MAX_PROFILED_CPU_SHARE):
+  именно на этот код ложится накладной расход профайлера. Ожидание executor процессор не занимает.
+- Секция может ждать await, и всё это время cProfile включён для всего потока event loop —
+  в отчёт попадает и код других интеграций/корутин, выполнявшийся в эти паузы.
+- Результат: .prof (для snakeviz/pstats) и текстовая сводка top-N в /config/zone_manager_profiles.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_PROFILER
+from .metrics import get_metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_DIR = "zone_manager_profiles"
+
+DEFAULT_DURATION_S = 60
+MAX_DURATION_S = 600
+DEFAULT_MAX_CALLS = 0  # 0 = без ограничения (действует только лимит времени)
+MAX_CALLS = 100000
+DEFAULT_TOP_N = 30
+MAX_TOP_N = 200
+# Если CPU потока event loop под включённым cProfile превышает эту долю длительности сессии — останавливаемся
+MAX_PROFILED_CPU_SHARE = 0.25
+# ...но не раньше, чем пройдёт столько секунд (иначе первый же вызов превысит долю)
+PROFILED_SHARE_GRACE_S = 2.0
+
+
+def _current_task() -> asyncio.Task | None:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class ProfileSession:
+    """Одна ограниченная сессия профилирования."""
+
+    def __init__(self, hass: HomeAssistant, duration: float, max_calls: int, top_n: int) -> None:
+        self.hass = hass
+        self.duration = duration
+        self.max_calls = max_calls
+        self.top_n = top_n
+
+        self.started_at = time.perf_counter()
+        self.started_wall = datetime.now()
+        self.calls = 0
+        # CPU-время потока event loop, пока cProfile включён (time.thread_time)
+        self.profiled_cpu_s = 0.0
+        self.stop_reason: str | None = None
+
+        self._profile = cProfile.Profile()
+        # задача -> глубина вложенных секций; cProfile включён, пока словарь не пуст
+        self._depths: dict[asyncio.Task | None, int] = {}
+        self._enabled_at = 0.0
+        self._active = True
+        self._cancel_timer: Callable[[], None] | None = None
+
+    # ---------------------------
+    # Хуки секций (вызываются из metrics._Timer в event loop)
+    # ---------------------------
+    def section_enter(self) -> None:
+        if not self._active:
+            return
+        task = _current_task()
+        depth = self._depths.get(task, 0)
+        if depth == 0:
+            self.calls += 1
+            if not self._depths:
+                try:
+                    self._profile.enable()
+                except ValueError as err:
+                    # Другой профайлер уже активен (например, интеграция profiler HA)
+                    _LOGGER.warning("Cannot enable cProfile: %s", err)
+                    self._request_stop("profiler_busy")
+                    return
+                self._enabled_at = time.thread_time()
+        self._depths[task] = depth + 1
+
+    def section_exit(self) -> None:
+        if not self._active:
+            return
+        task = _current_task()
+        depth = self._depths.get(task)
+        if not depth:
+            return
+        if depth > 1:
+            self._depths[task] = depth - 1
+            return
+        del self._depths[task]
+        if self._depths:
+            return  # другие задачи ещё внутри секций — профиль остаётся включённым
+
+        self._profile.disable()
+        self.profiled_cpu_s += time.thread_time() - self._enabled_at
+
+        if self.max_calls and self.calls >= self.max_calls:
+            self._request_stop("max_calls")
+            return
+        elapsed = time.perf_counter() - self.started_at
+        if elapsed >= PROFILED_SHARE_GRACE_S and self.profiled_cpu_s / elapsed > MAX_PROFILED_CPU_SHARE:
+            self._request_stop("profiled_cpu_share")
+
+    # ---------------------------
+    # Остановка и отчёт
+    # ---------------------------
+    @callback
+    def _request_stop(self, reason: str) -> None:
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            self.hass.async_create_task(async_stop_profiling(self.hass, reason))
+
+    def deactivate(self) -> None:
+        """Выключить хуки (секции, начатые до остановки, просто завершатся)."""
+        self._active = False
+        if self._depths:
+            self._profile.disable()
+            self.profiled_cpu_s += time.thread_time() - self._enabled_at
+            self._depths.clear()
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+
+    def write_report(self, out_dir: str) -> dict[str, Any]:
+        """Сохранить .prof и сводку (вызывается в executor)."""
+        os.makedirs(out_dir, exist_ok=True)
+        base = os.path.join(out_dir, f"zone_manager_{self.started_wall:%Y%m%d_%H%M%S}")
+        prof_path = f"{base}.prof"
+        summary_path = f"{base}.txt"
+
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(prof_path)
+
+        elapsed = time.perf_counter() - self.started_at
+        buf = io.StringIO()
+        buf.write(
+            "Zone Manager profile\n"
+            f"started: {self.started_wall.isoformat(timespec='seconds')}\n"
+            f"elapsed_s: {elapsed:.2f}\n"
+            f"stop_reason: {self.stop_reason}\n"
+            f"calls: {self.calls}\n"
+            f"profiled_cpu_s: {self.profiled_cpu_s:.3f} (event loop thread CPU while cProfile was on)\n"
+            "note: sections may await; while they wait the event loop profile also includes other coroutines\n\n"
+        )
+        stats.stream = buf
+        buf.write(f"=== Top {self.top_n} by cumulative time ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        buf.write(f"=== Top {self.top_n} by own time ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        buf.write(f"=== zone_manager functions (top {self.top_n} cumulative) ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats("zone_manager", self.top_n)
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+
+        return {
+            "prof_path": prof_path,
+            "summary_path": summary_path,
+            "elapsed_s": round(elapsed, 3),
+            "calls": self.calls,
+            "profiled_cpu_s": round(self.profiled_cpu_s, 3),
+            "stop_reason": self.stop_reason,
+        }
+
+
+def async_start_profiling(hass: HomeAssistant, duration: float, max_calls: int, top_n: int) -> ProfileSession | None:
+    """Начать сессию. None — если сессия уже идёт."""
+    if hass.data.get(DATA_PROFILER) is not None:
+        return None
+
+    duration = max(1.0, min(float(duration), MAX_DURATION_S))
+    max_calls = max(0, min(int(max_calls), MAX_CALLS))
+    top_n = max(5, min(int(top_n), MAX_TOP_N))
+
+    session = ProfileSession(hass, duration, max_calls, top_n)
+
+    @callback
+    def _on_timeout(_now: Any) -> None:
+        session._cancel_timer = None
+        session._request_stop("duration")
+
+    session._cancel_timer = async_call_later(hass, duration, _on_timeout)
+    hass.data[DATA_PROFILER] = session
+    get_metrics(hass).profiler = session
+    _LOGGER.info("Profiling started (duration=%ss max_calls=%s top=%s)", duration, max_calls, top_n)
+    return session
+
+
+async def async_stop_profiling(hass: HomeAssistant, reason: str = "manual") -> dict[str, Any] | None:
+    """Остановить текущую сессию и записать отчёт. None — если сессии нет."""
+    session: ProfileSession | None = hass.data.pop(DATA_PROFILER, None)
+    if session is None:
+        return None
+
+    if session.stop_reason is None:
+        session.stop_reason = reason
+    session.deactivate()
+    metrics = get_metrics(hass)
+    if metrics.profiler is session:
+        metrics.profiler = None
+
+    out_dir = hass.config.path(PROFILE_DIR)
+    result = await hass.async_add_executor_job(session.write_report, out_dir)
+    _LOGGER.info(
+        "Profiling stopped (reason=%s calls=%d) -> %s",
+        result["stop_reason"],
+        result["calls"],
+        result["prof_path"],
+    )
+    return result
@@ -0,0 +1,244 @@
+"""Index of entity references in Zone Manager config (битые и осиротевшие ссылки).
+
+Зачем:
+- Датчики и группы света переименовывают/удаляют в HA, а JSON продолжает хранить старые entity_id
+  (ключи зон, neighbors, far_neighbors, neighbor_groups, light_group).
+- Обратный индекс: entity_id -> где он упоминается (entry, пространство, зона, поле).
+  Наполняется из registry.py по изменённым пространствам, без полного обхода конфига.
+- Статус ссылок пересчитывается по событиям entity_registry_updated / state_changed —
+  только для entity_id, которые есть в индексе. Полных пересканов registry нет.
+  state_changed слушается через async_track_state_change_event по набору проиндексированных
+  entity_id (одна подписка на набор, переподписка после изменения индекса), а не на всю шину:
+  чужие изменения состояний до нашего кода не доходят.
+- Тот же индекс находит все места для массового «переименовать entity_id везде».
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import ZONE_FIELDS_LISTS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Поле "zone" — ссылка ключом зоны (датчик самой зоны)
+REF_FIELD_ZONE = "zone"
+
+# Сущности нет ни в entity registry, ни в state machine
+STATUS_DEAD = "dead"
+# Сущность есть в registry, но отключена или её не предоставляет ни одна интеграция
+STATUS_ORPHAN = "orphan"
+
+# (entry_id, пространство, ключ зоны, поле)
+RefLocation = tuple[str, str, str, str]
+
+
+def _space_refs(space_obj: dict[str, Any]) -> dict[str, set[tuple[str, str]]]:
+    """entity_id -> {(зона, поле)} для одного пространства."""
+    out: dict[str, set[tuple[str, str]]] = {}
+    zones = space_obj.get("zones") or {}
+    if not isinstance(zones, dict):
+        return out
+    for zone_key, zone in zones.items():
+        if not isinstance(zone_key, str) or not zone_key:
+            continue
+        out.setdefault(zone_key, set()).add((zone_key, REF_FIELD_ZONE))
+        if not isinstance(zone, dict):
+            continue
+        for fld in ZONE_FIELDS_LISTS:
+            values = zone.get(fld)
+            if not isinstance(values, list):
+                continue
+            for value in values:
+                if isinstance(value, str) and value:
+                    out.setdefault(value, set()).add((zone_key, fld))
+    return out
+
+
+class ZoneReferenceIndex:
+    """Обратный индекс ссылок + статусы проблемных entity_id."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # entity_id -> места, где он упоминается
+        self._refs: dict[str, set[RefLocation]] = {}
+        # (entry_id, пространство) -> entity_id, на которые оно ссылается
+        self._by_space: dict[tuple[str, str], set[str]] = {}
+        # entity_id -> STATUS_* (только проблемные)
+        self._problems: dict[str, str] = {}
+        # старый entity_id -> новый (из событий переименования в entity registry)
+        self._renamed: dict[str, str] = {}
+        self._unsubs: list[Callable[[], None]] = []
+        # Подписка на state_changed по набору _tracked (пересобирается в async_sync_tracking)
+        self._tracked: frozenset[str] = frozenset()
+        self._unsub_states: Callable[[], None] | None = None
+
+    # ---------------------------
+    # Подписки
+    # ---------------------------
+    @callback
+    def async_start(self) -> None:
+        if self._unsubs:
+            return
+        self._unsubs = [
+            self.hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._on_entity_registry),
+        ]
+        self.async_sync_tracking()
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+        self._set_tracking(frozenset())
+
+    @callback
+    def async_sync_tracking(self) -> None:
+        """Переподписать state_changed, если набор проиндексированных entity_id изменился.
+
+        Вызывается registry после пачки update_space/drop_entry (а не на каждое пространство).
+        """
+        if not self._unsubs:
+            return
+        ids = frozenset(self._refs)
+        if ids != self._tracked:
+            self._set_tracking(ids)
+
+    def _set_tracking(self, ids: frozenset[str]) -> None:
+        if self._unsub_states is not None:
+            self._unsub_states()
+            self._unsub_states = None
+        self._tracked = ids
+        if ids:
+            self._unsub_states = async_track_state_change_event(self.hass, ids, self._on_state_changed)
+
+    @callback
+    def _on_entity_registry(self, event: Event) -> None:
+        data = event.data
+        entity_id = data.get("entity_id")
+        old_entity_id = data.get("old_entity_id")
+        if old_entity_id and old_entity_id in self._refs:
+            self._renamed[old_entity_id] = entity_id
+            self._check(old_entity_id)
+        if entity_id in self._refs:
+            self._check(entity_id)
+
+    @callback
+    def _on_state_changed(self, event: Event) -> None:
+        # Приходят только отслеживаемые entity_id; проверка на случай, если индекс уже изменился
+        entity_id = event.data.get("entity_id")
+        if entity_id not in self._refs:
+            return
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        # Статус меняется только при появлении/исчезновении состояния или смене restored
+        if (
+            old_state is None
+            or new_state is None
+            or old_state.attributes.get("restored") != new_state.attributes.get("restored")
+        ):
+            self._check(entity_id)
+
+    # ---------------------------
+    # Обновление индекса (из registry.py)
+    # ---------------------------
+    def update_space(self, entry_id: str, space_name: str, space_obj: dict[str, Any] | None) -> None:
+        """Переиндексировать одно пространство (None — пространство удалено).
+
+        Старые места снимаются, новые добавляются, и только потом забываются entity_id,
+        на которые больше никто не ссылается: иначе пересохранение пространства
+        стирало бы статус и подсказку «переименован в ...» у ссылок, которые в нём остались.
+        """
+        key = (entry_id, space_name)
+        old_ids = self._by_space.pop(key, set())
+        for entity_id in old_ids:
+            locations = self._refs.get(entity_id)
+            if locations is not None:
+                locations.difference_update({loc for loc in locations if loc[0] == entry_id and loc[1] == space_name})
+
+        refs = _space_refs(space_obj) if space_obj is not None else {}
+        if refs:
+            self._by_space[key] = set(refs)
+        for entity_id, places in refs.items():
+            locations = self._refs.get(entity_id)
+            is_new = locations is None
+            if is_new:
+                locations = self._refs[entity_id] = set()
+            locations.update((entry_id, space_name, zone_key, fld) for zone_key, fld in places)
+            if is_new:
+                self._check(entity_id)
+
+        for entity_id in old_ids - refs.keys():
+            if entity_id in self._refs and not self._refs[entity_id]:
+                self._forget(entity_id)
+
+    def drop_entry(self, entry_id: str) -> None:
+        for entry, space_name in [k for k in self._by_space if k[0] == entry_id]:
+            self.update_space(entry, space_name, None)
+
+    def _forget(self, entity_id: str) -> None:
+        del self._refs[entity_id]
+        self._problems.pop(entity_id, None)
+        self._renamed.pop(entity_id, None)
+
+    def _check(self, entity_id: str) -> None:
+        status = self._status(entity_id)
+        previous = self._problems.get(entity_id)
+        if status == previous:
+            return
+        if status is None:
+            del self._problems[entity_id]
+            self._renamed.pop(entity_id, None)
+        else:
+            self._problems[entity_id] = status
+        _LOGGER.debug("Reference %s: %s -> %s", entity_id, previous, status)
+
+    def _status(self, entity_id: str) -> str | None:
+        reg_entry = er.async_get(self.hass).async_get(entity_id)
+        state = self.hass.states.get(entity_id)
+        if reg_entry is None:
+            # YAML-сущности без unique_id есть только в state machine
+            return STATUS_DEAD if state is None else None
+        if reg_entry.disabled_by is not None or state is None or state.attributes.get("restored"):
+            return STATUS_ORPHAN
+        return None
+
+    # ---------------------------
+    # Чтение
+    # ---------------------------
+    def locations(self, entity_id: str) -> set[RefLocation]:
+        return set(self._refs.get(entity_id, ()))
+
+    def problems(self, space_name: str | None = None) -> list[dict[str, Any]]:
+        """Проблемные ссылки (опционально — только в одном пространстве)."""
+        out: list[dict[str, Any]] = []
+        for entity_id, status in self._problems.items():
+            refs = [
+                {"entry_id": entry_id, "space": space, "zone": zone_key, "field": fld}
+                for entry_id, space, zone_key, fld in self._refs.get(entity_id, ())
+                if space_name is None or space == space_name
+            ]
+            if not refs:
+                continue
+            refs.sort(key=lambda r: (r["space"], r["zone"], r["field"]))
+            item: dict[str, Any] = {"entity_id": entity_id, "status": status, "refs": refs}
+            if entity_id in self._renamed:
+                item["renamed_to"] = self._renamed[entity_id]
+            out.append(item)
+        out.sort(key=lambda x: (x["status"], x["entity_id"]))
+        return out
+
+    def as_dict(self) -> dict[str, Any]:
+        """Сводка для diagnostics (без самих entity_id)."""
+        statuses = list(self._problems.values())
+        return {
+            "referenced_entities": len(self._refs),
+            STATUS_DEAD: statuses.count(STATUS_DEAD),
+            STATUS_ORPHAN: statuses.count(STATUS_ORPHAN),
+            "renamed": len(self._renamed),
+        }
@@ -0,0 +1,242 @@
+"""Domain-level registry of Zone Manager storages (несколько config entry).
+
+Зачем:
+- Каждая config entry — свой JSON-файл (запись затрагивает только свой файл),
+  но поиск, сервисы и WS-команды должны видеть все файлы сразу.
+- Единый индекс: entity_id датчика зоны -> (entry_id, пространство) по всем загруженным storage.
+  get_sensor_config — поиск по словарю вместо обхода всех пространств.
+- Индекс обновляется инкрементально: загрузка/выгрузка entry и сохранение
+  (только изменённые пространства, по уведомлениям storage).
+- Реестр один на HA (hass.data[DATA_REGISTRY]), как и metrics.
+- Те же изменения пространств питают индекс ссылок (references.py).
+- Здесь же живёт кэш состава групп света (groups.py) для get_sensor_config с expand.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_REGISTRY
+from .groups import GroupMembershipCache
+from .references import ZoneReferenceIndex
+from .storage import ZoneManagerStorage
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ZoneManagerRegistry:
+    """Загруженные storage + объединённый индекс зон.
+
+    При дублях (один ключ зоны или одно имя пространства в нескольких файлах) действует
+    entry, загруженная раньше; внутри одного файла — пространство, первое по алфавиту.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.storages: dict[str, ZoneManagerStorage] = {}
+        # Ссылки на entity_id из всех файлов (битые/осиротевшие, обратный индекс для rename)
+        self.references = ZoneReferenceIndex(hass)
+        # Раскрытые группы света (light_group / neighbor_groups -> участники)
+        self.groups = GroupMembershipCache(hass)
+        self._unsubs: dict[str, Callable[[], None]] = {}
+        # entry_id -> порядковый номер загрузки (приоритет при дублях)
+        self._order: dict[str, int] = {}
+        self._next_order = 0
+        # ключ зоны -> [(entry_id, пространство), ...]; первый элемент — действующий
+        self._index: dict[str, list[tuple[str, str]]] = {}
+        # entry_id -> пространство -> ключи его зон
+        self._space_keys: dict[str, dict[str, set[str]]] = {}
+        # пространство -> entry_id, где оно есть; первый — действующий
+        self._space_entries: dict[str, list[str]] = {}
+
+    # ---------------------------
+    # Жизненный цикл entry
+    # ---------------------------
+    @callback
+    def async_add(self, storage: ZoneManagerStorage) -> None:
+        """Подключить загруженный storage (после async_load)."""
+        entry_id = storage.entry.entry_id
+        if entry_id in self.storages:
+            self.async_remove(entry_id)
+        if not self.storages:
+            self.references.async_start()
+
+        self.storages[entry_id] = storage
+        self._order[entry_id] = self._next_order
+        self._next_order += 1
+        self._reindex(entry_id, None)
+        self._unsubs[entry_id] = storage.async_add_listener(functools.partial(self._reindex, entry_id))
+        _LOGGER.debug("Registry: added entry_id=%s (zones indexed=%d)", entry_id, len(self._index))
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Отключить storage выгружаемой entry и убрать её зоны из индекса."""
+        unsub = self._unsubs.pop(entry_id, None)
+        if unsub is not None:
+            unsub()
+        if self.storages.pop(entry_id, None) is None:
+            return
+        for name in list(self._space_keys.get(entry_id, {})):
+            self._drop_space(entry_id, name)
+        self._space_keys.pop(entry_id, None)
+        self._order.pop(entry_id, None)
+        self.references.drop_entry(entry_id)
+        self.references.async_sync_tracking()
+        if not self.storages:
+            self.references.async_stop()
+            self.groups.async_stop()
+        _LOGGER.debug("Registry: removed entry_id=%s (zones indexed=%d)", entry_id, len(self._index))
+
+    # ---------------------------
+    # Индекс
+    # ---------------------------
+    def _reindex(self, entry_id: str, changed: set[str] | None) -> None:
+        """Переиндексировать изменённые пространства entry (None — все)."""
+        storage = self.storages.get(entry_id)
+        if storage is None:
+            return
+        spaces: dict[str, Any] = storage.data.get("spaces", {})
+        entry_spaces = self._space_keys.setdefault(entry_id, {})
+        names = set(spaces) | set(entry_spaces) if changed is None else changed
+
+        for name in names:
+            self._drop_space(entry_id, name)
+            space_obj = spaces.get(name)
+            if not isinstance(space_obj, dict):
+                self.references.update_space(entry_id, name, None)
+                continue
+            self.references.update_space(entry_id, name, space_obj)
+            zones = space_obj.get("zones") or {}
+            keys = {key for key, zone in zones.items() if isinstance(zone, dict)} if isinstance(zones, dict) else set()
+            entry_spaces[name] = keys
+            self._insert(self._space_entries.setdefault(name, []), entry_id, self._entry_rank)
+
+            owner = (entry_id, name)
+            for key in keys:
+                owners = self._index.setdefault(key, [])
+                self._insert(owners, owner, self._owner_rank)
+                if len(owners) > 1:
+                    _LOGGER.warning(
+                        "Zone %s is defined more than once (%s); using space '%s' of entry %s",
+                        key,
+                        ", ".join(f"{eid}/{space}" for eid, space in owners),
+                        owners[0][1],
+                        owners[0][0],
+                    )
+        self.references.async_sync_tracking()
+        # Конфиг изменился — набор групп в light_group / neighbor_groups мог поменяться
+        self.groups.async_invalidate()
+
+    def _drop_space(self, entry_id: str, name: str) -> None:
+        keys = self._space_keys.get(entry_id, {}).pop(name, None)
+        if keys is None:
+            return
+        owner = (entry_id, name)
+        for key in keys:
+            owners = self._index.get(key)
+            if owners is None:
+                continue
+            if owner in owners:
+                owners.remove(owner)
+            if not owners:
+                del self._index[key]
+        entries = self._space_entries.get(name)
+        if entries is not None:
+            if entry_id in entries:
+                entries.remove(entry_id)
+            if not entries:
+                del self._space_entries[name]
+
+    def _entry_rank(self, entry_id: str) -> int:
+        return self._order.get(entry_id, self._next_order)
+
+    def _owner_rank(self, owner: tuple[str, str]) -> tuple[int, str]:
+        return self._entry_rank(owner[0]), owner[1]
+
+    @staticmethod
+    def _insert(items: list[Any], item: Any, rank: Callable[[Any], Any]) -> None:
+        """Вставить с сохранением приоритета (списки из 1-2 элементов — сортировка дешёвая)."""
+        items.append(item)
+        if len(items) > 1:
+            items.sort(key=rank)
+
+    # ---------------------------
+    # Поиск и маршрутизация
+    # ---------------------------
+    def lookup(self, entity_id: str) -> tuple[ZoneManagerStorage | None, str | None, dict[str, Any] | None]:
+        """Найти зону по entity_id датчика: (storage, пространство, объект зоны)."""
+        owners = self._index.get(entity_id)
+        if not owners:
+            return None, None, None
+        entry_id, space_name = owners[0]
+        storage = self.storages[entry_id]
+        space_obj = storage.get_space(space_name) or {}
+        zone = (space_obj.get("zones") or {}).get(entity_id)
+        return storage, space_name, zone if isinstance(zone, dict) else None
+
+    def storage_for_space(self, space_name: str) -> ZoneManagerStorage | None:
+        """Storage, в котором лежит пространство (None — такого пространства нет)."""
+        entries = self._space_entries.get(space_name)
+        return self.storages[entries[0]] if entries else None
+
+    def get_storage(self, entry_id: str | None = None) -> ZoneManagerStorage | None:
+        """Storage конкретной entry; без entry_id — entry, загруженная первой (для новых пространств)."""
+        if entry_id:
+            return self.storages.get(entry_id)
+        if not self.storages:
+            return None
+        return self.storages[min(self.storages, key=self._entry_rank)]
+
+    def get_space(self, space_name: str) -> dict[str, Any] | None:
+        storage = self.storage_for_space(space_name)
+        return storage.get_space(space_name) if storage is not None else None
+
+    def list_spaces(self) -> list[dict[str, Any]]:
+        """Пространства всех файлов (как storage.list_spaces + entry_id источника)."""
+        out: list[dict[str, Any]] = []
+        for name, entries in self._space_entries.items():
+            entry_id = entries[0]
+            out.append(
+                {
+                    "name": name,
+                    "zones_count": len(self._space_keys[entry_id].get(name, ())),
+                    "entry_id": entry_id,
+                }
+            )
+        out.sort(key=lambda x: x["name"].lower())
+        return out
+
+    # ---------------------------
+    # Операции над всеми storage
+    # ---------------------------
+    async def async_reload(self) -> None:
+        """Перечитать все файлы (индекс обновится по уведомлениям storage)."""
+        await asyncio.gather(*(storage.async_reload() for storage in list(self.storages.values())))
+
+    async def async_save(self) -> None:
+        """Записать все файлы."""
+        await asyncio.gather(*(storage.async_save() for storage in list(self.storages.values())))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Сводка для diagnostics."""
+        return {
+            "entries": len(self.storages),
+            "spaces": len(self._space_entries),
+            "indexed_zones": len(self._index),
+            "duplicate_zones": sum(1 for owners in self._index.values() if len(owners) > 1),
+            "duplicate_spaces": sum(1 for entries in self._space_entries.values() if len(entries) > 1),
+            "references": self.references.as_dict(),
+            "groups": self.groups.as_dict(),
+        }
+
+
+def get_registry(hass: HomeAssistant) -> ZoneManagerRegistry:
+    """Общий реестр storage интеграции (создаётся при первом обращении)."""
+    registry = hass.data.get(DATA_REGISTRY)
+    if registry is None:
+        registry = hass.data[DATA_REGISTRY] = ZoneManagerRegistry(hass)
+    return registry
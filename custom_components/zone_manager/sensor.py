@@ -0,0 +1,281 @@
+"""Sensor platform for Zone Manager (опционально, включается в опциях интеграции).
+
+Зачем:
+- Показать счётчики и задержки из metrics на дашборде / в истории HA.
+- Сущности метрик опрашиваются раз в SCAN_INTERVAL: горячий путь не пишет в state machine.
+- Сущности зон: по одной на зону, конфиг зоны в атрибутах. Шаблоны и условия читают
+  state_attr(...) без вызова get_sensor_config. Создаются/удаляются инкрементально
+  по уведомлениям storage (только изменённые пространства).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, CONF_METRICS_SENSORS, CONF_ZONE_ENTITIES, ZONE_FIELDS_LISTS
+from .metrics import ZoneManagerMetrics, get_metrics
+from .storage import ZoneManagerStorage, _zone_config
+
+_LOGGER = logging.getLogger(__name__)
+
+SCAN_INTERVAL = timedelta(seconds=30)
+
+# unique_id сущности зоны: f"{entry_id}{ZONE_UNIQUE_ID_INFIX}{ключ зоны}"
+ZONE_UNIQUE_ID_INFIX = "_zone_"
+
+
+def _p95(name: str) -> Callable[[ZoneManagerMetrics], float | None]:
+    def value(metrics: ZoneManagerMetrics) -> float | None:
+        hist = metrics.histogram(name)
+        return hist.quantile_ms(0.95) if hist is not None else None
+
+    return value
+
+
+def _count(name: str) -> Callable[[ZoneManagerMetrics], int]:
+    def value(metrics: ZoneManagerMetrics) -> int:
+        hist = metrics.histogram(name)
+        return hist.count if hist is not None else 0
+
+    return value
+
+
+@dataclass(frozen=True, kw_only=True)
+class ZoneManagerMetricDescription(SensorEntityDescription):
+    """Описание метрики: value_fn достаёт значение из реестра."""
+
+    value_fn: Callable[[ZoneManagerMetrics], float | int | None]
+
+
+METRIC_SENSORS: tuple[ZoneManagerMetricDescription, ...] = (
+    ZoneManagerMetricDescription(
+        key="lookups",
+        name="Lookups",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=_count("service.get_sensor_config"),
+    ),
+    ZoneManagerMetricDescription(
+        key="lookup_hits",
+        name="Lookup hits",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m.counter("lookup.hit"),
+    ),
+    ZoneManagerMetricDescription(
+        key="lookup_misses",
+        name="Lookup misses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m.counter("lookup.miss"),
+    ),
+    ZoneManagerMetricDescription(
+        key="lookup_latency_p95",
+        name="Lookup latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_p95("service.get_sensor_config"),
+    ),
+    ZoneManagerMetricDescription(
+        key="saves",
+        name="Saves",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=_count("storage.async_save"),
+    ),
+    ZoneManagerMetricDescription(
+        key="disk_read_latency_p95",
+        name="Disk read latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_p95("storage.disk_read"),
+    ),
+    ZoneManagerMetricDescription(
+        key="disk_write_latency_p95",
+        name="Disk write latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_p95("storage.disk_write"),
+    ),
+)
+
+
+def _device_info(entry: ConfigEntry) -> DeviceInfo:
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.title,
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    """Создать сенсоры метрик и/или зон для entry (по опциям)."""
+    ent_reg = er.async_get(hass)
+    metric_unique_ids = {f"{entry.entry_id}_{desc.key}" for desc in METRIC_SENSORS}
+
+    if entry.options.get(CONF_METRICS_SENSORS, False):
+        metrics = get_metrics(hass)
+        async_add_entities(ZoneManagerMetricSensor(entry, metrics, desc) for desc in METRIC_SENSORS)
+    else:
+        # Опцию выключили — убираем сущности метрик из registry, а не оставляем «недоступными»
+        for reg_entry in er.async_entries_for_config_entry(ent_reg, entry.entry_id):
+            if reg_entry.unique_id in metric_unique_ids:
+                ent_reg.async_remove(reg_entry.entity_id)
+
+    zone_prefix = f"{entry.entry_id}{ZONE_UNIQUE_ID_INFIX}"
+    if entry.options.get(CONF_ZONE_ENTITIES, False):
+        storage: ZoneManagerStorage = hass.data[DOMAIN][entry.entry_id]
+        manager = ZoneEntityManager(hass, entry, storage, async_add_entities)
+        manager.async_update(None)
+        entry.async_on_unload(storage.async_add_listener(manager.async_update))
+        keep = {f"{zone_prefix}{key}" for key in manager.entities}
+    else:
+        keep = set()
+
+    # Зоны, удалённые пока HA был выключен (или все, если опция выключена)
+    for reg_entry in er.async_entries_for_config_entry(ent_reg, entry.entry_id):
+        if reg_entry.unique_id.startswith(zone_prefix) and reg_entry.unique_id not in keep:
+            ent_reg.async_remove(reg_entry.entity_id)
+
+
+class ZoneManagerMetricSensor(SensorEntity):
+    """Одна метрика интеграции."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    entity_description: ZoneManagerMetricDescription
+
+    def __init__(self, entry: ConfigEntry, metrics: ZoneManagerMetrics, description: ZoneManagerMetricDescription) -> None:
+        self.entity_description = description
+        self._metrics = metrics
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = _device_info(entry)
+
+    @property
+    def native_value(self) -> float | int | None:
+        return self.entity_description.value_fn(self._metrics)
+
+
+def _zone_attributes(space_name: str, zone_key: str, zone: dict[str, Any]) -> dict[str, Any]:
+    """Атрибуты сущности зоны: те же поля, что в ответе get_sensor_config."""
+    return {"zone": zone_key, **_zone_config(space_name, zone)}
+
+
+class ZoneEntityManager:
+    """Держит сущности зон в соответствии со storage.
+
+    По уведомлению storage пересматриваются только изменённые пространства:
+    новые зоны -> async_add_entities, изменённые -> async_write_ha_state,
+    пропавшие -> удаление из entity registry.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        storage: ZoneManagerStorage,
+        async_add_entities: AddEntitiesCallback,
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.storage = storage
+        self._async_add_entities = async_add_entities
+        # ключ зоны -> сущность
+        self.entities: dict[str, ZoneConfigSensor] = {}
+        # пространство -> ключи его зон (чтобы находить удалённые зоны без полного обхода)
+        self._space_zones: dict[str, set[str]] = {}
+
+    @callback
+    def async_update(self, changed: set[str] | None) -> None:
+        """changed — имена изменённых/удалённых пространств (None — всё)."""
+        spaces = self.storage.data.get("spaces", {})
+        names = set(spaces) | set(self._space_zones) if changed is None else changed
+
+        new_entities: list[ZoneConfigSensor] = []
+        gone: set[str] = set()
+        for name in names:
+            space_obj = spaces.get(name)
+            zones = space_obj.get("zones", {}) if isinstance(space_obj, dict) else {}
+            gone |= self._space_zones.pop(name, set()) - zones.keys()
+            if zones:
+                self._space_zones[name] = set(zones)
+
+            for key, zone in zones.items():
+                if not isinstance(zone, dict):
+                    continue
+                entity = self.entities.get(key)
+                if entity is None:
+                    entity = self.entities[key] = ZoneConfigSensor(self.entry, name, key, zone)
+                    new_entities.append(entity)
+                else:
+                    entity.async_set_zone(name, zone)
+
+        # Зона могла переехать в другое пространство в том же сохранении — её не трогаем
+        for key in gone:
+            entity = self.entities.get(key)
+            if entity is None or key in self._space_zones.get(entity.space_name, ()):
+                continue
+            del self.entities[key]
+            self._async_remove(entity)
+
+        if new_entities:
+            _LOGGER.debug("Adding %d zone entities", len(new_entities))
+            self._async_add_entities(new_entities)
+
+    @callback
+    def _async_remove(self, entity: ZoneConfigSensor) -> None:
+        ent_reg = er.async_get(self.hass)
+        if entity.entity_id and ent_reg.async_get(entity.entity_id) is not None:
+            # Удаление из registry снимает и саму сущность
+            ent_reg.async_remove(entity.entity_id)
+        elif entity.hass is not None:
+            self.hass.async_create_task(entity.async_remove())
+
+
+class ZoneConfigSensor(SensorEntity):
+    """Конфиг одной зоны: состояние — имя пространства, списки — в атрибутах.
+
+    entity_id предсказуемый: sensor.zone_manager_<object_id датчика зоны>,
+    например для sensor.ms_4_1_4_3_state —
+    state_attr('sensor.zone_manager_ms_4_1_4_3_state', 'neighbors').
+    """
+
+    _attr_should_poll = False
+    _attr_icon = "mdi:vector-square"
+    # Конфиг не меняется от события к событию — не раздуваем recorder списками
+    _unrecorded_attributes = frozenset({*ZONE_FIELDS_LISTS, "light_group_single", "zone"})
+
+    def __init__(self, entry: ConfigEntry, space_name: str, zone_key: str, zone: dict[str, Any]) -> None:
+        self.zone_key = zone_key
+        self.space_name = space_name
+        self._attr_unique_id = f"{entry.entry_id}{ZONE_UNIQUE_ID_INFIX}{zone_key}"
+        self._attr_name = f"Zone {zone_key}"
+        self._attr_device_info = _device_info(entry)
+        # Предложение для registry (уже зарегистрированные сущности сохраняют свой entity_id)
+        self.entity_id = f"sensor.{DOMAIN}_{zone_key.partition('.')[2] or zone_key}"
+        self._attr_native_value = space_name
+        self._attr_extra_state_attributes = _zone_attributes(space_name, zone_key, zone)
+
+    @callback
+    def async_set_zone(self, space_name: str, zone: dict[str, Any]) -> None:
+        """Обновить конфиг; пишем состояние только если что-то изменилось."""
+        attrs = _zone_attributes(space_name, self.zone_key, zone)
+        if space_name == self.space_name and attrs == self._attr_extra_state_attributes:
+            return
+        self.space_name = space_name
+        self._attr_native_value = space_name
+        self._attr_extra_state_attributes = attrs
+        if self.hass is not None:
+            self.async_write_ha_state()
@@ -4,6 +4,11 @@ v0.2: добавлен сервис get_sensor_config с response data + нор
 - reload: перечитать файл вручную
 - export: принудительно записать текущие данные в файл
 - get_sensor_config: получить конфиг зоны по trigger sensor entity_id (для автоматизаций через response_variable)
+- profile_start / profile_stop: ограниченная сессия cProfile по коду интеграции (см. profiler.py)
+- import / export_file: массовая загрузка и выгрузка зон в CSV / JSONL (см. bulk.py)
+
+Сервисы регистрируются один раз на домен (async_setup) и работают через registry.py:
+поиск идёт по объединённому индексу всех config entry, reload/export — по всем файлам.
 
 services.yaml обязателен по стандарту. :contentReference[oaicite:3]{index=3}
 """
@@ -18,72 +23,55 @@ import voluptuous as vol
 from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, ServiceResponse
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, ZONE_FIELDS_LISTS
-from .storage import ZoneManagerStorage
+from .bulk import (
+    DEFAULT_MAX_ERRORS,
+    FORMAT_AUTO,
+    FORMAT_CSV,
+    FORMATS,
+    MAX_ERRORS_LIMIT,
+    MODE_MERGE,
+    MODES,
+    async_apply_import,
+    check_against_config,
+    detect_format,
+    parse_import_file,
+    parse_import_text,
+    resolve_export_path,
+    resolve_path,
+    write_export,
+)
+from .const import DOMAIN
+from .lookup_export import lookup_path
+from .metrics import get_metrics
+from .profiler import (
+    DEFAULT_DURATION_S,
+    DEFAULT_MAX_CALLS,
+    DEFAULT_TOP_N,
+    MAX_CALLS,
+    MAX_DURATION_S,
+    MAX_TOP_N,
+    async_start_profiling,
+    async_stop_profiling,
+)
+from .registry import get_registry
+from .storage import _zone_config
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def _find_zone_by_entity_id(data: dict[str, Any], entity_id: str) -> tuple[str | None, dict[str, Any] | None]:
-    """Ищем зону по ключу entity_id в структуре:
-    data["spaces"][<space_name>]["zones"][<entity_id>]
-
-    Возвращает:
-    - space_name (или None)
-    - zone_obj (или None)
-    """
-    spaces = (data or {}).get("spaces") or {}
-    if not isinstance(spaces, dict):
-        return None, None
-
-    for space_name, space_obj in spaces.items():
-        zones = (space_obj or {}).get("zones") or {}
-        if isinstance(zones, dict) and entity_id in zones:
-            zone = zones.get(entity_id)
-            if isinstance(zone, dict):
-                return str(space_name), zone
-            return str(space_name), None
-
-    return None, None
-
-
-def _as_list(value: Any) -> list[str]:
-    """Нормализуем значение к list[str].
-
-    Поддерживаем:
-    - list[str] -> list[str]
-    - "a, b" -> ["a","b"]
-    - "a" -> ["a"]
-    - None/прочее -> []
-    """
-    if value is None:
-        return []
-
-    if isinstance(value, list):
-        return [str(x).strip() for x in value if str(x).strip()]
-
-    if isinstance(value, str):
-        v = value.strip()
-        if not v:
-            return []
-        if "," in v:
-            return [x.strip() for x in v.split(",") if x.strip()]
-        return [v]
-
-    # Непредвиденный тип — безопасно игнорируем
-    return []
-
-
-async def async_register_services(hass: HomeAssistant, storage: ZoneManagerStorage) -> None:
-    """Register services once."""
+async def async_register_services(hass: HomeAssistant) -> None:
+    """Register services once (для всех config entry сразу)."""
     _LOGGER.debug("Registering services")
+    registry = get_registry(hass)
+    metrics = get_metrics(hass)
 
     # ---------------------------
     # reload
     # ---------------------------
+    @metrics.timed("service.reload")
     async def handle_reload(call: ServiceCall) -> None:
         _LOGGER.info("Service reload called")
-        await storage.async_reload()
+        await registry.async_reload()
 
     if not hass.services.has_service(DOMAIN, "reload"):
         hass.services.async_register(DOMAIN, "reload", handle_reload)
@@ -93,9 +81,10 @@ async def async_register_services(hass: HomeAssistant, storage: ZoneManagerStora
     # ---------------------------
     # export
     # ---------------------------
+    @metrics.timed("service.export")
     async def handle_export(call: ServiceCall) -> None:
         _LOGGER.info("Service export called")
-        await storage.async_save()
+        await registry.async_save()
 
     if not hass.services.has_service(DOMAIN, "export"):
         hass.services.async_register(DOMAIN, "export", handle_export)
@@ -105,25 +94,28 @@ async def async_register_services(hass: HomeAssistant, storage: ZoneManagerStora
     # ---------------------------
     # get_sensor_config
     # ---------------------------
+    @metrics.timed("service.get_sensor_config")
     async def handle_get_sensor_config(call: ServiceCall) -> ServiceResponse | None:
         """Вернуть конфиг зоны по entity_id.
 
         Зачем:
         - Автоматизация не читает JSON-файл напрямую
-        - Получаем конфиг из storage.data (в памяти)
+        - Получаем конфиг из индекса registry (в памяти, все config entry)
         - Возвращаем через response_variable
         """
         entity_id: str = call.data["entity_id"]
         do_reload: bool = bool(call.data.get("reload", False))
+        do_expand: bool = bool(call.data.get("expand", False))
 
-        _LOGGER.debug("Service get_sensor_config called entity_id=%s reload=%s", entity_id, do_reload)
+        _LOGGER.debug(
+            "Service get_sensor_config called entity_id=%s reload=%s expand=%s", entity_id, do_reload, do_expand
+        )
 
         if do_reload:
             _LOGGER.info("get_sensor_config: reloading storage before lookup (entity_id=%s)", entity_id)
-            await storage.async_reload()
+            await registry.async_reload()
 
-        data = storage.data
-        space_name, zone = _find_zone_by_entity_id(data, entity_id)
+        _storage, space_name, zone = registry.lookup(entity_id)
 
         # Базовый ответ (всегда одинаковая форма)
         response: dict[str, Any] = {
@@ -139,35 +131,33 @@ async def async_register_services(hass: HomeAssistant, storage: ZoneManagerStora
             # где light_group используется как строка в is_state(...).
             "light_group_single": "",
         }
+        if do_expand:
+            # Участники групп (вложенные группы раскрыты), из кэша registry.groups
+            response["light_group_members"] = []
+            response["neighbor_group_members"] = []
 
         if zone is None:
+            metrics.inc("lookup.miss")
             _LOGGER.warning("get_sensor_config: not found entity_id=%s", entity_id)
             if call.return_response:
                 return response
             return None
 
-        # Нормализуем ожидаемые поля зоны (на всякий случай, даже если storage уже нормализовал)
-        normalized: dict[str, Any] = {}
-        for field in ZONE_FIELDS_LISTS:
-            normalized[field] = _as_list(zone.get(field))
-
-        light_group_list = normalized.get("light_group", [])
-        light_group_single = light_group_list[0] if len(light_group_list) == 1 else ""
-
+        metrics.inc("lookup.hit")
         response.update(
             {
                 "found": True,
-                "space": space_name,
                 "zone": zone,  # сырой объект (как в JSON), полезно для диагностики
-                "neighbors": normalized.get("neighbors", []),
-                "far_neighbors": normalized.get("far_neighbors", []),
-                "neighbor_groups": normalized.get("neighbor_groups", []),
-                "light_group": light_group_list,
-                "light_group_single": light_group_single,
+                # space + нормализованные списки + light_group_single (те же поля — в lookup-файле и сущностях зон)
+                **_zone_config(space_name, zone),
             }
         )
+        if do_expand:
+            response["light_group_members"] = registry.groups.expand(response["light_group"])
+            response["neighbor_group_members"] = registry.groups.expand(response["neighbor_groups"])
 
-        _LOGGER.info(
+        # DEBUG, а не INFO: это горячий путь (каждое срабатывание датчика); счётчики — в metrics
+        _LOGGER.debug(
             "get_sensor_config: found entity_id=%s space=%s neighbors=%d far=%d groups=%d light_group=%s",
             entity_id,
             space_name,
@@ -186,6 +176,7 @@ async def async_register_services(hass: HomeAssistant, storage: ZoneManagerStora
         {
             vol.Required("entity_id"): cv.entity_id,
             vol.Optional("reload", default=False): cv.boolean,
+            vol.Optional("expand", default=False): cv.boolean,
         }
     )
 
@@ -200,4 +191,214 @@ async def async_register_services(hass: HomeAssistant, storage: ZoneManagerStora
     else:
         _LOGGER.debug("Service get_sensor_config already registered")
 
+    # ---------------------------
+    # profile_start / profile_stop
+    # ---------------------------
+    async def handle_profile_start(call: ServiceCall) -> ServiceResponse | None:
+        session = async_start_profiling(
+            hass,
+            duration=call.data["duration"],
+            max_calls=call.data["max_calls"],
+            top_n=call.data["top"],
+        )
+        if session is None:
+            _LOGGER.warning("profile_start: profiling is already running")
+            response: dict[str, Any] = {"started": False, "reason": "already_running"}
+        else:
+            response = {
+                "started": True,
+                "duration": session.duration,
+                "max_calls": session.max_calls,
+                "top": session.top_n,
+            }
+        return response if call.return_response else None
+
+    schema_profile_start = vol.Schema(
+        {
+            vol.Optional("duration", default=DEFAULT_DURATION_S): vol.All(
+                vol.Coerce(float), vol.Range(min=1, max=MAX_DURATION_S)
+            ),
+            vol.Optional("max_calls", default=DEFAULT_MAX_CALLS): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=MAX_CALLS)
+            ),
+            vol.Optional("top", default=DEFAULT_TOP_N): vol.All(vol.Coerce(int), vol.Range(min=5, max=MAX_TOP_N)),
+        }
+    )
+
+    if not hass.services.has_service(DOMAIN, "profile_start"):
+        hass.services.async_register(
+            DOMAIN,
+            "profile_start",
+            handle_profile_start,
+            schema=schema_profile_start,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    else:
+        _LOGGER.debug("Service profile_start already registered")
+
+    async def handle_profile_stop(call: ServiceCall) -> ServiceResponse | None:
+        result = await async_stop_profiling(hass, "manual")
+        if result is None:
+            _LOGGER.warning("profile_stop: profiling is not running")
+            response: dict[str, Any] = {"stopped": False, "reason": "not_running"}
+        else:
+            response = {"stopped": True, **result}
+        return response if call.return_response else None
+
+    if not hass.services.has_service(DOMAIN, "profile_stop"):
+        hass.services.async_register(
+            DOMAIN,
+            "profile_stop",
+            handle_profile_stop,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    else:
+        _LOGGER.debug("Service profile_stop already registered")
+
+    # ---------------------------
+    # import / export_file
+    # ---------------------------
+    @metrics.timed("service.import")
+    async def handle_import(call: ServiceCall) -> ServiceResponse | None:
+        path = call.data.get("path")
+        mode = call.data["mode"]
+        dry_run = call.data["dry_run"]
+        fmt = detect_format(call.data["format"], path)
+        max_errors = call.data["max_errors"]
+        _LOGGER.info("Service import called path=%s format=%s mode=%s dry_run=%s", path, fmt, mode, dry_run)
+
+        response: dict[str, Any] = {"ok": False, "dry_run": dry_run, "mode": mode, "format": fmt}
+        if path:
+            full_path = resolve_path(hass, path)
+            if full_path is None:
+                response.update(error_count=1, errors=[{"line": None, "code": "path_not_allowed",
+                                                         "text": "File is outside /config"}])
+                return response if call.return_response else None
+            try:
+                # Наличие файла проверяет сам open в executor (не os.path.isfile в event loop)
+                result = await hass.async_add_executor_job(parse_import_file, full_path, fmt, max_errors)
+            except OSError as err:
+                response.update(error_count=1, errors=[{"line": None, "code": "file_not_found",
+                                                         "text": f"Cannot read file: {err.strerror or err}"}])
+                return response if call.return_response else None
+        else:
+            result = await hass.async_add_executor_job(parse_import_text, call.data["data"], fmt, max_errors)
+
+        check_against_config(registry, result, mode)
+        response.update(
+            rows=result.rows,
+            spaces=len(result.spaces),
+            zones=len(result.zones),
+            error_count=result.error_count,
+            errors=result.errors,
+            truncated=result.error_count > len(result.errors),
+        )
+
+        if result.error_count:
+            _LOGGER.warning("import: %d errors, nothing applied", result.error_count)
+        elif not dry_run:
+            try:
+                response.update(await async_apply_import(registry, result, mode, call.data.get("entry_id")))
+            except ValueError as err:
+                response.update(error_count=1, errors=[{"line": None, "code": str(err), "text": "No target entry"}])
+                return response if call.return_response else None
+            failed = response["failed_files"]
+            if failed:
+                # storage.async_save не пробрасывает ошибки записи — отдаём реальный результат
+                response.update(
+                    error_count=len(failed),
+                    errors=[
+                        {"line": None, "code": "write_failed", "text": "File was not written, its changes were rolled back",
+                         "path": failed_path}
+                        for failed_path in failed
+                    ],
+                )
+                _LOGGER.error("import: failed to write %s", ", ".join(failed))
+            else:
+                response["ok"] = True
+                _LOGGER.info("import: applied %d zones in %d spaces", len(result.zones), len(result.spaces))
+        else:
+            response["ok"] = True
+
+        return response if call.return_response else None
+
+    schema_import = vol.All(
+        cv.has_at_least_one_key("path", "data"),
+        vol.Schema(
+            {
+                vol.Exclusive("path", "source"): cv.string,
+                vol.Exclusive("data", "source"): cv.string,
+                vol.Optional("format", default=FORMAT_AUTO): vol.In((FORMAT_AUTO, *FORMATS)),
+                vol.Optional("mode", default=MODE_MERGE): vol.In(MODES),
+                vol.Optional("entry_id"): cv.string,
+                vol.Optional("dry_run", default=False): cv.boolean,
+                vol.Optional("max_errors", default=DEFAULT_MAX_ERRORS): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=MAX_ERRORS_LIMIT)
+                ),
+            }
+        ),
+    )
+
+    if not hass.services.has_service(DOMAIN, "import"):
+        hass.services.async_register(
+            DOMAIN,
+            "import",
+            handle_import,
+            schema=schema_import,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    else:
+        _LOGGER.debug("Service import already registered")
+
+    @metrics.timed("service.export_file")
+    async def handle_export_file(call: ServiceCall) -> ServiceResponse | None:
+        fmt = call.data["format"]
+        path = call.data.get("path")
+        only = set(call.data.get("space") or [])
+        _LOGGER.info("Service export_file called path=%s format=%s spaces=%s", path, fmt, sorted(only) or "all")
+
+        protected = {storage.config_path for storage in registry.storages.values()}
+        protected |= {lookup_path(config_path) for config_path in protected}
+        try:
+            full_path = resolve_export_path(hass, path, fmt, protected)
+        except ValueError as err:
+            _LOGGER.warning("export_file: refused path=%s (%s)", path, err)
+            response: dict[str, Any] = {"ok": False, "reason": str(err)}
+            return response if call.return_response else None
+
+        # Снимок ссылок в event loop: storage заменяет объекты пространств целиком, а не правит на месте
+        spaces = [
+            (item["name"], registry.get_space(item["name"]) or {})
+            for item in registry.list_spaces()
+            if not only or item["name"] in only
+        ]
+        try:
+            rows = await hass.async_add_executor_job(write_export, full_path, fmt, spaces)
+        except OSError as err:
+            # Диск заполнен, нет прав, /config только для чтения — та же форма ответа, что и для отказа по пути
+            _LOGGER.error("export_file: failed to write %s: %s", full_path, err)
+            response = {"ok": False, "reason": "write_failed", "path": full_path, "error": err.strerror or str(err)}
+            return response if call.return_response else None
+        response = {"ok": True, "path": full_path, "format": fmt, "spaces": len(spaces), "rows": rows}
+        return response if call.return_response else None
+
+    schema_export_file = vol.Schema(
+        {
+            vol.Optional("path"): cv.string,
+            vol.Optional("format", default=FORMAT_CSV): vol.In(FORMATS),
+            vol.Optional("space"): vol.All(cv.ensure_list, [cv.string]),
+        }
+    )
+
+    if not hass.services.has_service(DOMAIN, "export_file"):
+        hass.services.async_register(
+            DOMAIN,
+            "export_file",
+            handle_export_file,
+            schema=schema_export_file,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    else:
+        _LOGGER.debug("Service export_file already registered")
+
     _LOGGER.info("Services registered")
@@ -4,6 +4,9 @@
 - Хранить источник истины в /config/zone_manager.json (как вы хотите).
 - Делать атомарную запись (tmp -> replace), логировать операции.
 - Давать удобные методы для CRUD на пространства.
+- Инкрементально сохранять: нормализуем и сериализуем только изменённые пространства,
+  остальные берём из кэша JSON-фрагментов.
+- Сообщать подписчикам, какие пространства изменились (для сущностей зон и индексов).
 """
 
 from __future__ import annotations
@@ -14,8 +17,8 @@ import os
 import shutil
 import tempfile
 import async_timeout
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Callable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -26,6 +29,7 @@ from .const import (
     ZONE_FIELDS_LISTS,
     DEFAULT_CONFIG_FILENAME,  # <-- добавить
 )
+from .metrics import ZoneManagerMetrics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,10 +40,25 @@ class ZoneManagerStorage:
 
     hass: HomeAssistant
     entry: ConfigEntry
+    # Реестр метрик; в async_setup_entry передаётся общий (get_metrics(hass))
+    metrics: ZoneManagerMetrics = field(default_factory=ZoneManagerMetrics)
 
     _data: dict[str, Any] | None = None
     _lock: Any = None  # asyncio.Lock (инициализируем в async_load)
 
+    # Кэш чистых пространств: name -> (нормализованный объект, JSON-фрагмент для файла).
+    # Зачем: async_save не должен нормализовать и кодировать всё здание ради одной правки.
+    _space_cache: dict[str, tuple[dict[str, Any], str]] = field(default_factory=dict)
+    # Пространства, изменённые после последнего успешного сохранения
+    _dirty_spaces: set[str] = field(default_factory=set)
+    # Удалённые через delete_space после последнего сохранения (их нет ни в данных, ни в кэше —
+    # без этого множества async_save не сообщил бы подписчикам об удалении)
+    _deleted_spaces: set[str] = field(default_factory=set)
+    # Объекты, уже нормализованные в save_space/create_space: async_save кодирует их без повторной нормализации
+    _prenormalized: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # Подписчики на изменения: listener(changed) — имена изменённых/удалённых пространств, None = всё
+    _listeners: list[Callable[[set[str] | None], None]] = field(default_factory=list)
+
     @property
     def config_path(self) -> str:
         """Абсолютный путь к JSON файлу.
@@ -69,22 +88,31 @@ class ZoneManagerStorage:
         needs_save = False
         path = self.config_path
 
-        async with self._lock:
+        async with self._lock, self.metrics.timer("storage.async_load"):
             _LOGGER.info("Loading Zone Manager config from %s", path)
 
             try:
                 # Предохранитель: не даём зависнуть на чтении файла
                 async with async_timeout.timeout(10):
                     _LOGGER.debug("Reading JSON file (executor) start: %s", path)
-                    raw = await self.hass.async_add_executor_job(_read_json_file, path)
+                    with self.metrics.timer("storage.disk_read"):
+                        raw = await self.hass.async_add_executor_job(_read_json_file, path)
                     _LOGGER.debug("Reading JSON file (executor) done: %s", path)
             except TimeoutError:
                 _LOGGER.error("Timeout while reading JSON file: %s. Using empty config.", path)
+                self.metrics.inc("storage.read_errors")
                 raw = None
             except Exception as err:
                 _LOGGER.exception("Unexpected error while reading JSON file %s: %s", path, err)
+                self.metrics.inc("storage.read_errors")
                 raw = None
 
+            # Данные заменяются целиком — кэш фрагментов больше не актуален
+            self._space_cache.clear()
+            self._dirty_spaces.clear()
+            self._deleted_spaces.clear()
+            self._prenormalized.clear()
+
             if raw is None:
                 _LOGGER.warning("Config file not found or invalid, will create new at %s", path)
                 self._data = self._new_empty()
@@ -98,40 +126,108 @@ class ZoneManagerStorage:
                     len(self._data.get("spaces", {})),
                 )
 
+            self._notify_listeners(None)
+
         # ВАЖНО: сохраняем уже ПОСЛЕ выхода из lock (иначе дедлок)
         if needs_save:
             await self.async_save()
 
 
-    async def async_save(self) -> None:
-        """Сохранить текущие данные в файл (атомарно, с таймаутом)."""
+    async def async_save(self) -> bool:
+        """Сохранить текущие данные в файл (атомарно, с таймаутом).
+
+        Ошибки записи не пробрасываются (HA не должен падать), но результат возвращается:
+        False — файл не записан. Данные в памяти при этом уже изменены, подписчики не уведомляются,
+        а изменённые пространства снова помечаются dirty/deleted — их запишет и разошлёт следующее сохранение.
+        Нормализуются и кодируются только пространства из _dirty_spaces (или отсутствующие в кэше),
+        остальные берутся из _space_cache готовыми JSON-фрагментами.
+        """
         import asyncio
 
         if self._lock is None:
             self._lock = asyncio.Lock()
 
-        async with self._lock:
+        async with self._lock, self.metrics.timer("storage.async_save"):
             path = self.config_path
-            payload = _normalize_and_validate(self.data)
-
-            _LOGGER.info("Saving Zone Manager config to %s", path)
+            if self._data is None:
+                self._data = self._new_empty()
+            data = self._data
+            version = str(data.get("version") or DATA_VERSION)
+            spaces = data.get("spaces")
+            if not isinstance(spaces, dict):
+                spaces = {}
+
+            out_spaces: dict[str, Any] = {}
+            fragments: list[str] = []
+            new_cache: dict[str, tuple[dict[str, Any], str]] = {}
+            changed: set[str] = set()
+            for space_name, space_obj in spaces.items():
+                if not isinstance(space_name, str) or not space_name.strip():
+                    continue
+                cached = self._space_cache.get(space_name)
+                # Кэш верен, пока объект пространства тот же (см. get_space: правки на месте запрещены);
+                # объект могли подменить мимо CRUD-методов — тогда кэш по identity не совпадёт
+                if space_name in self._dirty_spaces or cached is None or cached[0] is not space_obj:
+                    if self._prenormalized.get(space_name) is space_obj:
+                        normalized = space_obj
+                    else:
+                        normalized = _normalize_space(space_obj)
+                    cached = (normalized, _encode_space_fragment(space_name, normalized))
+                    changed.add(space_name)
+                new_cache[space_name] = cached
+                out_spaces[space_name] = cached[0]
+                fragments.append(cached[1])
+
+            # Кэш описывает сериализацию данных в памяти (а не файла), поэтому фиксируем его
+            # до записи: правки, пришедшие во время await ниже, снова пометят пространство dirty.
+            data["version"] = version
+            data["spaces"] = out_spaces
+            changed.update(self._space_cache.keys() - new_cache.keys())  # удалённые мимо delete_space
+            changed.update(self._deleted_spaces)
+            encoded = len(new_cache.keys() & changed)
+            self._space_cache = new_cache
+            self._dirty_spaces.clear()
+            self._deleted_spaces.clear()
+            self._prenormalized.clear()
+
+            text = _render_document(version, fragments)
+            self.metrics.inc("storage.spaces_encoded", encoded)
+
+            _LOGGER.info("Saving Zone Manager config to %s (encoded spaces=%d)", path, encoded)
 
             try:
                 # Предохранитель: не даём зависнуть на записи
                 async with async_timeout.timeout(10):
                     _LOGGER.debug("Writing JSON file (executor) start: %s", path)
-                    await self.hass.async_add_executor_job(_write_json_atomic_with_backup, path, payload)
+                    with self.metrics.timer("storage.disk_write"):
+                        await self.hass.async_add_executor_job(_write_json_atomic_with_backup, path, text)
                     _LOGGER.debug("Writing JSON file (executor) done: %s", path)
             except TimeoutError:
                 _LOGGER.error("Timeout while writing JSON file: %s", path)
+                self.metrics.inc("storage.write_errors")
                 # Не падаем — чтобы интеграция не блокировала HA
-                return
+                self._remark_unsaved(changed)
+                return False
             except Exception as err:
                 _LOGGER.exception("Failed to write JSON file %s: %s", path, err)
-                return
-
-            self._data = payload
-            _LOGGER.debug("Save completed (spaces=%d)", len(payload.get("spaces", {})))
+                self.metrics.inc("storage.write_errors")
+                self._remark_unsaved(changed)
+                return False
+
+            # Подписчики (registry, ссылки, сущности зон, lookup-файл) видят только записанное
+            if changed:
+                self._notify_listeners(changed)
+            _LOGGER.debug("Save completed (spaces=%d)", len(out_spaces))
+            return True
+
+    def _remark_unsaved(self, changed: set[str]) -> None:
+        """Запись не удалась: вернуть пометки, чтобы следующее сохранение снова записало и разослало их."""
+        spaces = self.data.get("spaces", {})
+        for name in changed:
+            if name in spaces:
+                self._dirty_spaces.add(name)
+            else:
+                self._deleted_spaces.add(name)
 
 
     async def async_reload(self) -> None:
@@ -142,6 +238,28 @@ class ZoneManagerStorage:
     async def async_close(self) -> None:
         """На будущее: закрытие/очистка ресурсов."""
         _LOGGER.debug("Storage close called")
+        self._listeners.clear()
+
+    def async_add_listener(self, listener: Callable[[set[str] | None], None]) -> Callable[[], None]:
+        """Подписаться на изменения пространств. Возвращает функцию отписки.
+
+        listener вызывается в event loop после загрузки (None — изменилось всё)
+        и после сохранения (множество изменённых/удалённых пространств).
+        """
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    def _notify_listeners(self, changed: set[str] | None) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(changed)
+            except Exception as err:
+                _LOGGER.exception("Storage listener failed: %s", err)
 
     # ---------------------------
     # CRUD для пространств
@@ -157,7 +275,11 @@ class ZoneManagerStorage:
         return out
 
     def get_space(self, space_name: str) -> dict[str, Any] | None:
-        """Вернуть пространство целиком."""
+        """Вернуть пространство целиком.
+
+        Объект только для чтения: async_save берёт JSON-фрагмент из кэша, пока объект тот же,
+        поэтому правка на месте не попадёт в файл. Изменения — только через save_space / delete_space.
+        """
         spaces: dict[str, Any] = self.data.get("spaces", {})
         return spaces.get(space_name)
 
@@ -167,7 +289,8 @@ class ZoneManagerStorage:
         spaces: dict[str, Any] = data.setdefault("spaces", {})
         if space_name in spaces:
             raise ValueError("space_exists")
-        spaces[space_name] = {"zones": {}}
+        spaces[space_name] = self._prenormalized[space_name] = {"zones": {}}
+        self._dirty_spaces.add(space_name)
         _LOGGER.debug("Space created: %s", space_name)
 
     def delete_space(self, space_name: str) -> None:
@@ -177,13 +300,18 @@ class ZoneManagerStorage:
         if space_name not in spaces:
             raise ValueError("space_not_found")
         spaces.pop(space_name)
+        self._space_cache.pop(space_name, None)
+        self._dirty_spaces.discard(space_name)
+        self._deleted_spaces.add(space_name)
+        self._prenormalized.pop(space_name, None)
         _LOGGER.debug("Space deleted: %s", space_name)
 
     def save_space(self, space_name: str, space_obj: dict[str, Any]) -> None:
         """Сохранить пространство целиком (перезапись)."""
         data = self.data
         spaces: dict[str, Any] = data.setdefault("spaces", {})
-        spaces[space_name] = _normalize_space(space_obj)
+        spaces[space_name] = self._prenormalized[space_name] = _normalize_space(space_obj)
+        self._dirty_spaces.add(space_name)
         _LOGGER.debug("Space saved: %s (zones=%d)", space_name, len(spaces[space_name]["zones"]))
 
     # ---------------------------
@@ -211,8 +339,8 @@ def _read_json_file(path: str) -> dict[str, Any] | None:
         return None
 
 
-def _write_json_atomic_with_backup(path: str, data: dict[str, Any]) -> None:
-    """Атомарная запись JSON + backup (.bak)."""
+def _write_json_atomic_with_backup(path: str, text: str) -> None:
+    """Атомарная запись готового JSON-текста + backup (.bak)."""
     try:
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
@@ -229,7 +357,7 @@ def _write_json_atomic_with_backup(path: str, data: dict[str, Any]) -> None:
         fd, tmp_path = tempfile.mkstemp(prefix="zone_manager_", suffix=".json", dir=os.path.dirname(path))
         try:
             with os.fdopen(fd, "w", encoding="utf-8") as tmp:
-                json.dump(data, tmp, ensure_ascii=False, indent=2)
+                tmp.write(text)
                 tmp.flush()
                 os.fsync(tmp.fileno())
 
@@ -247,6 +375,25 @@ def _write_json_atomic_with_backup(path: str, data: dict[str, Any]) -> None:
         raise
 
 
+def _encode_space_fragment(space_name: str, space_obj: dict[str, Any]) -> str:
+    """Закодировать одно пространство как фрагмент `"name": {...}` внутри "spaces".
+
+    Отступы совпадают с json.dump(..., indent=2) для всего документа (глубина 2),
+    поэтому склеенный файл байт-в-байт равен полной сериализации.
+    """
+    body = json.dumps(space_obj, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+    return f"    {json.dumps(space_name, ensure_ascii=False)}: {body}"
+
+
+def _render_document(version: str, fragments: list[str]) -> str:
+    """Склеить документ из версии и готовых фрагментов пространств."""
+    version_json = json.dumps(version, ensure_ascii=False)
+    if not fragments:
+        return f'{{\n  "version": {version_json},\n  "spaces": {{}}\n}}'
+    spaces_body = ",\n".join(fragments)
+    return f'{{\n  "version": {version_json},\n  "spaces": {{\n{spaces_body}\n  }}\n}}'
+
+
 # ---------------------------
 # Валидация/нормализация данных (мягкая для v0.1)
 # ---------------------------
@@ -303,3 +450,42 @@ def _normalize_zone(zone_obj: Any) -> dict[str, Any]:
             out[field] = []
 
     return out
+
+
+def _as_list(value: Any) -> list[str]:
+    """Нормализуем значение к list[str].
+
+    Поддерживаем:
+    - list[str] -> list[str]
+    - "a, b" -> ["a","b"]
+    - "a" -> ["a"]
+    - None/прочее -> []
+    """
+    if value is None:
+        return []
+
+    if isinstance(value, list):
+        return [str(x).strip() for x in value if str(x).strip()]
+
+    if isinstance(value, str):
+        v = value.strip()
+        if not v:
+            return []
+        if "," in v:
+            return [x.strip() for x in v.split(",") if x.strip()]
+        return [v]
+
+    # Непредвиденный тип — безопасно игнорируем
+    return []
+
+
+def _zone_config(space_name: str, zone: dict[str, Any]) -> dict[str, Any]:
+    """Нормализованные поля зоны, как их отдаёт get_sensor_config (без found/entity_id/zone)."""
+    out: dict[str, Any] = {"space": space_name}
+    for field in ZONE_FIELDS_LISTS:
+        out[field] = _as_list(zone.get(field))
+    # Удобный “одиночный” вариант для текущих off-скриптов,
+    # где light_group используется как строка в is_state(...).
+    light_group = out["light_group"]
+    out["light_group_single"] = light_group[0] if len(light_group) == 1 else ""
+    return out
@@ -3,31 +3,46 @@
 Зачем:
 - Lovelace карточка общается с backend через WS.
 - По стандарту команды регистрируем ЯВНО через async_register_command. :contentReference[oaicite:5]{index=5}
+- subscribe_registry: карточка держит кэш сущностей у себя и получает только изменения registry.
+- Команды регистрируются один раз на домен и работают через registry.py: пространства всех
+  config entry видны вместе, запись уходит в файл, где лежит пространство.
+- references / rename_entity: битые ссылки на entity_id и массовое переименование по обратному индексу.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.components import websocket_api
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
 
-from .const import DOMAIN
+from .const import DOMAIN, ZONE_FIELDS_LISTS
+from .metrics import get_metrics
+from .references import REF_FIELD_ZONE
+from .registry import get_registry
 from .storage import ZoneManagerStorage, _normalize_space
 
 
 _LOGGER = logging.getLogger(__name__)
 
+# Пауза накопления изменений registry перед отправкой подписчикам, с
+REGISTRY_FLUSH_DELAY = 0.5
 
-async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) -> None:
-    """Register all WS commands explicitly."""
+
+async def async_register_ws(hass: HomeAssistant) -> None:
+    """Register all WS commands explicitly (для всех config entry сразу)."""
     _LOGGER.debug("Registering WebSocket commands")
+    registry = get_registry(hass)
+    metrics = get_metrics(hass)
 
     @websocket_api.websocket_command(
         {
@@ -35,9 +50,10 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.spaces_list")
     async def ws_spaces_list(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         _LOGGER.debug("WS spaces_list called")
-        connection.send_result(msg["id"], {"spaces": storage.list_spaces()})
+        connection.send_result(msg["id"], {"spaces": registry.list_spaces()})
 
     websocket_api.async_register_command(hass, ws_spaces_list)
 
@@ -48,10 +64,11 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.space_get")
     async def ws_space_get(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         space = msg["space"]
         _LOGGER.debug("WS space_get called space=%s", space)
-        obj = storage.get_space(space)
+        obj = registry.get_space(space)
         if obj is None:
             connection.send_error(msg["id"], "space_not_found", f"Space '{space}' not found")
             return
@@ -63,13 +80,22 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
         {
             vol.Required("type"): f"{DOMAIN}/space_create",
             vol.Required("space"): str,
+            # В какой файл (config entry) добавить; по умолчанию — entry, загруженная первой
+            vol.Optional("entry_id"): vol.Any(None, str),
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.space_create")
     async def ws_space_create(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         space = msg["space"].strip()
         _LOGGER.info("WS space_create space=%s", space)
+        storage = registry.get_storage(msg.get("entry_id"))
+        if storage is None:
+            connection.send_error(msg["id"], "entry_not_found", "Zone Manager entry is not loaded")
+            return
         try:
+            if registry.storage_for_space(space) is not None:
+                raise ValueError("space_exists")
             storage.create_space(space)
             await storage.async_save()
             connection.send_result(msg["id"], {"ok": True})
@@ -88,10 +114,14 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.space_delete")
     async def ws_space_delete(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         space = msg["space"].strip()
         _LOGGER.info("WS space_delete space=%s", space)
         try:
+            storage = registry.storage_for_space(space)
+            if storage is None:
+                raise ValueError("space_not_found")
             storage.delete_space(space)
             await storage.async_save()
             connection.send_result(msg["id"], {"ok": True})
@@ -103,117 +133,25 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
 
     websocket_api.async_register_command(hass, ws_space_delete)
 
-    def _validate_space_for_save(space_obj: dict[str, Any]) -> list[dict[str, Any]]:
-        """Серверная валидация данных space перед сохранением.
-
-        Возвращает список ошибок для UI.
-        Формат ошибки:
-          { zone, field, index?, code, text, expected?, actual? }
-        """
-        errors: list[dict[str, Any]] = []
-
-        zones = (space_obj or {}).get("zones", {}) or {}
-        if not isinstance(zones, dict):
-            return [{"zone": "", "field": "zones", "code": "invalid_type", "text": "zones must be an object"}]
-
-        for zone_key, zone_obj in zones.items():
-            if not isinstance(zone_key, str) or not zone_key.strip():
-                continue
-
-            z = zone_obj if isinstance(zone_obj, dict) else {}
-            neighbors = z.get("neighbors") if isinstance(z.get("neighbors"), list) else []
-            far_neighbors = z.get("far_neighbors") if isinstance(z.get("far_neighbors"), list) else []
-            neighbor_groups = z.get("neighbor_groups") if isinstance(z.get("neighbor_groups"), list) else []
-
-            # 1) zone_key не может быть в neighbors / far_neighbors
-            for idx, v in enumerate(neighbors):
-                if v == zone_key:
-                    errors.append({
-                        "zone": zone_key,
-                        "field": "neighbors",
-                        "index": idx,
-                        "code": "self_reference",
-                        "text": "Zone sensor (key) cannot be in neighbors",
-                    })
-            for idx, v in enumerate(far_neighbors):
-                if v == zone_key:
-                    errors.append({
-                        "zone": zone_key,
-                        "field": "far_neighbors",
-                        "index": idx,
-                        "code": "self_reference",
-                        "text": "Zone sensor (key) cannot be in far neighbors",
-                    })
-
-            # 2) Дубли в neighbors (внутри одной зоны)
-            seen: dict[str, int] = {}
-            for idx, v in enumerate(neighbors):
-                if not isinstance(v, str) or not v.strip():
-                    continue
-                if v in seen:
-                    errors.append({
-                        "zone": zone_key,
-                        "field": "neighbors",
-                        "index": idx,
-                        "code": "duplicate",
-                        "text": "Duplicate value in neighbors",
-                    })
-                else:
-                    seen[v] = idx
-
-            # 3) Дубли в far_neighbors (внутри одной зоны)
-            seen = {}
-            for idx, v in enumerate(far_neighbors):
-                if not isinstance(v, str) or not v.strip():
-                    continue
-                if v in seen:
-                    errors.append({
-                        "zone": zone_key,
-                        "field": "far_neighbors",
-                        "index": idx,
-                        "code": "duplicate",
-                        "text": "Duplicate value in far neighbors",
-                    })
-                else:
-                    seen[v] = idx
-
-            # 4) far_neighbors может повторять neighbors — НИЧЕГО НЕ ДЕЛАЕМ (разрешено)
-
-            # 5) Длины списков должны совпадать, ориентир = neighbors
-            exp = len(neighbors)
-            if len(far_neighbors) != exp:
-                errors.append({
-                    "zone": zone_key,
-                    "field": "far_neighbors",
-                    "code": "length_mismatch",
-                    "text": "far_neighbors length must match neighbors length",
-                    "expected": exp,
-                    "actual": len(far_neighbors),
-                })
-            if len(neighbor_groups) != exp:
-                errors.append({
-                    "zone": zone_key,
-                    "field": "neighbor_groups",
-                    "code": "length_mismatch",
-                    "text": "neighbor_groups length must match neighbors length",
-                    "expected": exp,
-                    "actual": len(neighbor_groups),
-                })
-
-        return errors
-
     @websocket_api.websocket_command(
         {
             vol.Required("type"): f"{DOMAIN}/space_save",
             vol.Required("space"): str,
             vol.Required("data"): dict,
+            # Только для нового пространства: в какой файл (config entry) его записать
+            vol.Optional("entry_id"): vol.Any(None, str),
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.space_save")
     async def ws_space_save(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         space = msg["space"].strip()
         data = msg["data"]
         _LOGGER.info("WS space_save space=%s", space)
+        storage = registry.storage_for_space(space) or registry.get_storage(msg.get("entry_id"))
+        if storage is None:
+            connection.send_error(msg["id"], "entry_not_found", "Zone Manager entry is not loaded")
+            return
 
         try:
             # Нормализуем вход (чтобы валидатор работал на чистой структуре)
@@ -242,12 +180,10 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.areas_list")
     async def ws_areas_list(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         _LOGGER.debug("WS areas_list called")
-        reg = ar.async_get(hass)
-        areas = [{"id": a.id, "name": a.name} for a in reg.async_list_areas()]
-        areas.sort(key=lambda x: x["name"].lower())
-        connection.send_result(msg["id"], {"areas": areas})
+        connection.send_result(msg["id"], {"areas": await _async_areas_list(hass)})
 
     websocket_api.async_register_command(hass, ws_areas_list)
 
@@ -261,6 +197,7 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
         }
     )
     @websocket_api.async_response
+    @metrics.timed("ws.entities_for_area")
     async def ws_entities_for_area(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
         area_id = msg.get("area_id")
         domains = msg.get("domains", ["sensor", "light"])
@@ -271,9 +208,396 @@ async def async_register_ws(hass: HomeAssistant, storage: ZoneManagerStorage) ->
 
     websocket_api.async_register_command(hass, ws_entities_for_area)
 
+    # ----- bootstrap -----
+    # Всё, что нужно карточке на старте, одним ответом (вместо spaces_list + areas_list + entities_for_area
+    # + space_get последовательными round trip'ами).
+    @websocket_api.websocket_command(
+        {
+            vol.Required("type"): f"{DOMAIN}/bootstrap",
+            vol.Optional("space"): vol.Any(None, str),
+            vol.Optional("domains", default=["sensor", "light"]): [str],
+            # false — у клиента уже есть кэш сущностей (другой экземпляр карточки), скан registry не нужен
+            vol.Optional("include_entities", default=True): bool,
+        }
+    )
+    @websocket_api.async_response
+    @metrics.timed("ws.bootstrap")
+    async def ws_bootstrap(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+        space = (msg.get("space") or "").strip()
+        domains = msg.get("domains", ["sensor", "light"])
+        _LOGGER.debug("WS bootstrap called space=%s domains=%s", space, domains)
+
+        # Оба хелпера синхронно читают registry в event loop (без await внутри) — вызываем по очереди,
+        # выигрыш bootstrap в одном round trip, а не в параллельности
+        areas = await _async_areas_list(hass)
+        entities = await _async_entities_for_area(hass, None, set(domains)) if msg.get("include_entities", True) else None
+
+        result: dict[str, Any] = {
+            "spaces": registry.list_spaces(),
+            "areas": areas,
+        }
+        if entities is not None:
+            result["entities"] = entities
+        if space:
+            # Несуществующее пространство — не ошибка для bootstrap: карточка просто не выберет его
+            result["space"] = {"space": space, "data": registry.get_space(space)}
+
+        connection.send_result(msg["id"], result)
+
+    websocket_api.async_register_command(hass, ws_bootstrap)
+
+    # ----- subscribe_registry -----
+    # Подписка на изменения entity/device/area registry. События копятся и уходят пачкой
+    # раз в REGISTRY_FLUSH_DELAY секунд: массовое добавление сущностей = одно сообщение.
+    @websocket_api.websocket_command(
+        {
+            vol.Required("type"): f"{DOMAIN}/subscribe_registry",
+            vol.Optional("domains", default=["sensor", "light"]): [str],
+        }
+    )
+    @websocket_api.async_response
+    async def ws_subscribe_registry(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+        domains = set(msg.get("domains", ["sensor", "light"]))
+        _LOGGER.debug("WS subscribe_registry domains=%s", domains)
+
+        pending_entities: set[str] = set()
+        pending_removed: set[str] = set()
+        pending: dict[str, Any] = {"areas": False, "cancel": None}
+
+        async def _flush(_now: Any) -> None:
+            pending["cancel"] = None
+            ent_reg = er.async_get(hass)
+            dev_reg = dr.async_get(hass)
+
+            changed: list[dict[str, Any]] = []
+            removed = set(pending_removed)
+            for entity_id in pending_entities:
+                entry = ent_reg.async_get(entity_id)
+                if entry is None:
+                    removed.add(entity_id)
+                elif entity_id.split(".", 1)[0] in domains:
+                    changed.append(_entity_info(hass, entry, dev_reg))
+            removed -= {e["entity_id"] for e in changed}
+
+            payload: dict[str, Any] = {"entities": changed, "removed": sorted(removed)}
+            if pending["areas"]:
+                payload["areas"] = await _async_areas_list(hass)
+
+            pending_entities.clear()
+            pending_removed.clear()
+            pending["areas"] = False
+            connection.send_message(websocket_api.event_message(msg["id"], payload))
+
+        @callback
+        def _schedule() -> None:
+            if pending["cancel"] is None:
+                pending["cancel"] = async_call_later(hass, REGISTRY_FLUSH_DELAY, _flush)
+
+        @callback
+        def _on_entity(event: Event) -> None:
+            data = event.data
+            entity_id = data.get("entity_id")
+            if data.get("action") == "remove":
+                pending_removed.add(entity_id)
+                pending_entities.discard(entity_id)
+            else:
+                pending_entities.add(entity_id)
+                # Переименование entity_id: старый id удаляем у клиента
+                old_entity_id = data.get("old_entity_id")
+                if old_entity_id:
+                    pending_removed.add(old_entity_id)
+            _schedule()
+
+        @callback
+        def _on_device(event: Event) -> None:
+            data = event.data
+            changes = data.get("changes") or {}
+            if data.get("action") == "update" and "area_id" not in changes:
+                return
+            # area устройства наследуют его сущности без собственной area
+            ent_reg = er.async_get(hass)
+            for entry in er.async_entries_for_device(ent_reg, data["device_id"], include_disabled_entities=True):
+                pending_entities.add(entry.entity_id)
+            _schedule()
+
+        @callback
+        def _on_area(event: Event) -> None:
+            pending["areas"] = True
+            _schedule()
+
+        unsubs = [
+            hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _on_entity),
+            hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, _on_device),
+            hass.bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, _on_area),
+        ]
+
+        @callback
+        def _unsubscribe() -> None:
+            for unsub in unsubs:
+                unsub()
+            if pending["cancel"] is not None:
+                pending["cancel"]()
+                pending["cancel"] = None
+
+        connection.subscriptions[msg["id"]] = _unsubscribe
+        connection.send_result(msg["id"])
+
+    websocket_api.async_register_command(hass, ws_subscribe_registry)
+
+    # ----- metrics -----
+    @websocket_api.websocket_command(
+        {
+            vol.Required("type"): f"{DOMAIN}/metrics",
+            vol.Optional("reset", default=False): bool,
+        }
+    )
+    @websocket_api.async_response
+    async def ws_metrics(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+        _LOGGER.debug("WS metrics called reset=%s", msg.get("reset"))
+        connection.send_result(msg["id"], {"metrics": metrics.as_dict()})
+        if msg.get("reset"):
+            metrics.reset()
+
+    websocket_api.async_register_command(hass, ws_metrics)
+
+    # ----- references -----
+    # Битые (dead) и осиротевшие (orphan) ссылки на entity_id; индекс ведётся по событиям registry.
+    @websocket_api.websocket_command(
+        {
+            vol.Required("type"): f"{DOMAIN}/references",
+            # Только ссылки из этого пространства (пусто/None = все)
+            vol.Optional("space"): vol.Any(None, str),
+        }
+    )
+    @websocket_api.async_response
+    @metrics.timed("ws.references")
+    async def ws_references(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+        space = (msg.get("space") or "").strip() or None
+        _LOGGER.debug("WS references space=%s", space)
+        connection.send_result(msg["id"], {"problems": registry.references.problems(space)})
+
+    websocket_api.async_register_command(hass, ws_references)
+
+    # ----- rename_entity -----
+    # Заменить entity_id во всех ключах зон и списках всех файлов. Места берутся из обратного индекса,
+    # каждое затронутое пространство проходит ту же валидацию, что и space_save.
+    @websocket_api.websocket_command(
+        {
+            vol.Required("type"): f"{DOMAIN}/rename_entity",
+            # старый id может быть и «мусорным» — его как раз и чиним
+            vol.Required("old_entity_id"): str,
+            # новый пишется в ключи зон и списки — формат как у импорта (valid_entity_id)
+            vol.Required("new_entity_id"): cv.entity_id,
+            # true — только посчитать замены и проверить валидацию, ничего не сохраняя
+            vol.Optional("dry_run", default=False): bool,
+        }
+    )
+    @websocket_api.async_response
+    @metrics.timed("ws.rename_entity")
+    async def ws_rename_entity(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+        old = msg["old_entity_id"].strip()
+        new = msg["new_entity_id"].strip()
+        dry_run = msg.get("dry_run", False)
+        _LOGGER.info("WS rename_entity %s -> %s dry_run=%s", old, new, dry_run)
+
+        if not old or not new or old == new:
+            connection.send_error(msg["id"], "invalid_entity_id", "old_entity_id and new_entity_id must differ")
+            return
+
+        locations = registry.references.locations(old)
+        renames_key = any(fld == REF_FIELD_ZONE for _e, _s, _z, fld in locations)
+        if renames_key and registry.lookup(new)[2] is not None:
+            connection.send_result(
+                msg["id"],
+                {
+                    "ok": False,
+                    "errors": [{"zone": old, "field": "zone_key", "code": "exists", "text": "Zone with this key already exists"}],
+                },
+            )
+            return
+
+        try:
+            updates: list[tuple[ZoneManagerStorage, str, dict[str, Any]]] = []
+            errors: list[dict[str, Any]] = []
+            replaced = 0
+            for entry_id, space in sorted({(e, s) for e, s, _z, _f in locations}):
+                storage = registry.storages.get(entry_id)
+                space_obj = storage.get_space(space) if storage is not None else None
+                if space_obj is None:
+                    continue
+                new_obj, count = _rename_in_space(space_obj, old, new)
+                space_errors = _validate_space_for_save(new_obj)
+                errors.extend({**err, "space": space} for err in space_errors)
+                updates.append((storage, space, new_obj))
+                replaced += count
+
+            if errors:
+                connection.send_result(msg["id"], {"ok": False, "errors": errors})
+                return
+
+            failed_files: list[str] = []
+            if not dry_run and updates:
+                for storage, space, new_obj in updates:
+                    storage.save_space(space, new_obj)
+                # Каждый файл пишется один раз, даже если в нём несколько затронутых пространств
+                touched = list({id(storage): storage for storage, _s, _o in updates}.values())
+                written = await asyncio.gather(*(storage.async_save() for storage in touched))
+                # async_save не пробрасывает ошибки записи — отдаём реальный результат, как import
+                failed_files = [storage.config_path for storage, ok in zip(touched, written) if not ok]
+
+            result: dict[str, Any] = {
+                "ok": not failed_files,
+                "dry_run": dry_run,
+                "replaced": replaced,
+                "spaces": sorted({space for _st, space, _o in updates}),
+            }
+            if failed_files:
+                _LOGGER.error("rename_entity: failed to write %s", ", ".join(failed_files))
+                result["failed_files"] = failed_files
+                result["errors"] = [
+                    {"zone": "", "field": "save", "code": "write_failed",
+                     "text": f"Applied in memory, but file was not written: {path}"}
+                    for path in failed_files
+                ]
+            connection.send_result(msg["id"], result)
+        except Exception as err:
+            _LOGGER.exception("rename_entity failed: %s", err)
+            connection.send_error(msg["id"], "unknown_error", "Failed to rename entity")
+
+    websocket_api.async_register_command(hass, ws_rename_entity)
+
     _LOGGER.info("WebSocket commands registered")
 
 
+def _validate_space_for_save(space_obj: dict[str, Any]) -> list[dict[str, Any]]:
+    """Серверная валидация данных space перед сохранением.
+
+    Возвращает список ошибок для UI.
+    Формат ошибки:
+      { zone, field, index?, code, text, expected?, actual? }
+    """
+    errors: list[dict[str, Any]] = []
+
+    zones = (space_obj or {}).get("zones", {}) or {}
+    if not isinstance(zones, dict):
+        return [{"zone": "", "field": "zones", "code": "invalid_type", "text": "zones must be an object"}]
+
+    for zone_key, zone_obj in zones.items():
+        if not isinstance(zone_key, str) or not zone_key.strip():
+            continue
+
+        z = zone_obj if isinstance(zone_obj, dict) else {}
+        neighbors = z.get("neighbors") if isinstance(z.get("neighbors"), list) else []
+        far_neighbors = z.get("far_neighbors") if isinstance(z.get("far_neighbors"), list) else []
+        neighbor_groups = z.get("neighbor_groups") if isinstance(z.get("neighbor_groups"), list) else []
+
+        # 1) zone_key не может быть в neighbors / far_neighbors
+        for idx, v in enumerate(neighbors):
+            if v == zone_key:
+                errors.append({
+                    "zone": zone_key,
+                    "field": "neighbors",
+                    "index": idx,
+                    "code": "self_reference",
+                    "text": "Zone sensor (key) cannot be in neighbors",
+                })
+        for idx, v in enumerate(far_neighbors):
+            if v == zone_key:
+                errors.append({
+                    "zone": zone_key,
+                    "field": "far_neighbors",
+                    "index": idx,
+                    "code": "self_reference",
+                    "text": "Zone sensor (key) cannot be in far neighbors",
+                })
+
+        # 2) Дубли в neighbors (внутри одной зоны)
+        seen: dict[str, int] = {}
+        for idx, v in enumerate(neighbors):
+            if not isinstance(v, str) or not v.strip():
+                continue
+            if v in seen:
+                errors.append({
+                    "zone": zone_key,
+                    "field": "neighbors",
+                    "index": idx,
+                    "code": "duplicate",
+                    "text": "Duplicate value in neighbors",
+                })
+            else:
+                seen[v] = idx
+
+        # 3) Дубли в far_neighbors (внутри одной зоны)
+        seen = {}
+        for idx, v in enumerate(far_neighbors):
+            if not isinstance(v, str) or not v.strip():
+                continue
+            if v in seen:
+                errors.append({
+                    "zone": zone_key,
+                    "field": "far_neighbors",
+                    "index": idx,
+                    "code": "duplicate",
+                    "text": "Duplicate value in far neighbors",
+                })
+            else:
+                seen[v] = idx
+
+        # 4) far_neighbors может повторять neighbors — НИЧЕГО НЕ ДЕЛАЕМ (разрешено)
+
+        # 5) Длины списков должны совпадать, ориентир = neighbors
+        exp = len(neighbors)
+        if len(far_neighbors) != exp:
+            errors.append({
+                "zone": zone_key,
+                "field": "far_neighbors",
+                "code": "length_mismatch",
+                "text": "far_neighbors length must match neighbors length",
+                "expected": exp,
+                "actual": len(far_neighbors),
+            })
+        if len(neighbor_groups) != exp:
+            errors.append({
+                "zone": zone_key,
+                "field": "neighbor_groups",
+                "code": "length_mismatch",
+                "text": "neighbor_groups length must match neighbors length",
+                "expected": exp,
+                "actual": len(neighbor_groups),
+            })
+
+    return errors
+
+
+def _rename_in_space(space_obj: dict[str, Any], old: str, new: str) -> tuple[dict[str, Any], int]:
+    """Копия пространства с заменой old -> new в ключах зон и списках; порядок зон сохраняется.
+
+    Возвращает (новое пространство, число замен).
+    """
+    replaced = 0
+    zones_out: dict[str, Any] = {}
+    for zone_key, zone_obj in ((space_obj or {}).get("zones") or {}).items():
+        if zone_key == old:
+            zone_key = new
+            replaced += 1
+        zone = dict(zone_obj) if isinstance(zone_obj, dict) else {}
+        for fld in ZONE_FIELDS_LISTS:
+            values = zone.get(fld)
+            if isinstance(values, list) and old in values:
+                replaced += values.count(old)
+                zone[fld] = [new if v == old else v for v in values]
+        zones_out[zone_key] = zone
+    return {**(space_obj or {}), "zones": zones_out}, replaced
+
+
+async def _async_areas_list(hass: HomeAssistant) -> list[dict[str, Any]]:
+    """Список area для фильтра карточки (id + name), по алфавиту."""
+    reg = ar.async_get(hass)
+    areas = [{"id": a.id, "name": a.name} for a in reg.async_list_areas()]
+    areas.sort(key=lambda x: x["name"].lower())
+    return areas
+
+
 async def _async_entities_for_area(hass: HomeAssistant, area_id: str | None, domains: set[str]) -> list[dict[str, Any]]:
     """Собрать сущности по area через Entity/Device Registry (правильно по стандарту). :contentReference[oaicite:6]{index=6}"""
     ent_reg = er.async_get(hass)
@@ -283,35 +607,41 @@ async def _async_entities_for_area(hass: HomeAssistant, area_id: str | None, dom
 
     # Берём именно registry, т.к. area_id — метаданные, не state.attributes :contentReference[oaicite:7]{index=7}
     for entry in ent_reg.entities.values():
-        entity_id = entry.entity_id
-        domain = entity_id.split(".", 1)[0]
+        domain = entry.entity_id.split(".", 1)[0]
         if domain not in domains:
             continue
 
-        resolved_area = entry.area_id
-        if resolved_area is None and entry.device_id is not None:
-            dev = dev_reg.devices.get(entry.device_id)
-            if dev is not None:
-                resolved_area = dev.area_id
-
-        if area_id and resolved_area != area_id:
+        info = _entity_info(hass, entry, dev_reg)
+        if area_id and info["area_id"] != area_id:
             continue
 
-        # friendly_name (если есть state)
-        st = hass.states.get(entity_id)
-        name = None
-        if st is not None:
-            name = st.attributes.get("friendly_name")
-        if not name:
-            name = entry.original_name or entity_id
-
-        out.append(
-            {
-                "entity_id": entity_id,
-                "name": name,
-                "domain": domain,
-            }
-        )
+        out.append(info)
 
     out.sort(key=lambda x: (x["domain"], x["name"].lower(), x["entity_id"]))
     return out
+
+
+def _entity_info(hass: HomeAssistant, entry: er.RegistryEntry, dev_reg: dr.DeviceRegistry) -> dict[str, Any]:
+    """Описание сущности для карточки: entity_id, имя, домен и area (своя или от устройства)."""
+    entity_id = entry.entity_id
+
+    resolved_area = entry.area_id
+    if resolved_area is None and entry.device_id is not None:
+        dev = dev_reg.devices.get(entry.device_id)
+        if dev is not None:
+            resolved_area = dev.area_id
+
+    # friendly_name (если есть state)
+    st = hass.states.get(entity_id)
+    name = None
+    if st is not None:
+        name = st.attributes.get("friendly_name")
+    if not name:
+        name = entry.original_name or entity_id
+
+    return {
+        "entity_id": entity_id,
+        "name": name,
+        "domain": entity_id.split(".", 1)[0],
+        "area_id": resolved_area,
+    }
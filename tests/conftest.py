@@ -0,0 +1,92 @@
+"""Общие фикстуры тестов Zone Manager.
+
+Зачем:
+- Фикстура hass из pytest-homeassistant-custom-component (requirements_test.txt):
+  настоящий core с загруженными area/device/entity registry, без бенчмарк-харнесса.
+- Storage создаётся так же, как в async_setup_entry, поверх минимального entry.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncGenerator
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.zone_manager.const import CONF_CONFIG_PATH
+from custom_components.zone_manager.metrics import get_metrics
+from custom_components.zone_manager.registry import ZoneManagerRegistry, get_registry
+from custom_components.zone_manager.storage import ZoneManagerStorage
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+CONFIG: dict[str, Any] = {
+    "version": "v0.1",
+    "spaces": {
+        "Этаж 4": {
+            "zones": {
+                "sensor.ms_4_1_state": {
+                    "neighbors": ["sensor.ms_4_2_state"],
+                    "far_neighbors": [],
+                    "neighbor_groups": ["light.g_4_2"],
+                    "light_group": ["light.g_4_1"],
+                },
+                "sensor.ms_4_2_state": {
+                    "neighbors": ["sensor.ms_4_1_state"],
+                    "far_neighbors": [],
+                    "neighbor_groups": ["light.g_4_1"],
+                    "light_group": ["light.g_4_2"],
+                },
+            }
+        },
+        "Этаж 5": {
+            "zones": {
+                "sensor.ms_5_1_state": {
+                    "neighbors": [],
+                    "far_neighbors": [],
+                    "neighbor_groups": [],
+                    "light_group": ["light.g_5_1"],
+                },
+            }
+        },
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """custom_components/ виден загрузчику HA."""
+
+
+async def async_make_storage(hass: HomeAssistant, path: str, entry_id: str = "entry_1") -> ZoneManagerStorage:
+    storage = ZoneManagerStorage(
+        hass=hass,
+        entry=SimpleNamespace(entry_id=entry_id, data={CONF_CONFIG_PATH: path}),
+        metrics=get_metrics(hass),
+    )
+    await storage.async_load()
+    return storage
+
+
+@pytest.fixture
+def config_path(tmp_path) -> str:
+    path = tmp_path / "zone_manager.json"
+    path.write_text(json.dumps(CONFIG, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+async def storage(hass: HomeAssistant, config_path: str) -> ZoneManagerStorage:
+    return await async_make_storage(hass, config_path)
+
+
+@pytest.fixture
+async def registry(hass: HomeAssistant, storage: ZoneManagerStorage) -> AsyncGenerator[ZoneManagerRegistry, None]:
+    registry = get_registry(hass)
+    registry.async_add(storage)
+    yield registry
+    registry.async_remove(storage.entry.entry_id)
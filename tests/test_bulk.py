@@ -0,0 +1,153 @@
+"""Разбор импорта и ограничение путей экспорта (bulk.py)."""
+
+from __future__ import annotations
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.zone_manager.bulk import (
+    EXPORT_DIR,
+    FORMAT_CSV,
+    FORMAT_JSONL,
+    MODE_MERGE,
+    async_apply_import,
+    parse_import_text,
+    resolve_export_path,
+)
+from custom_components.zone_manager.registry import ZoneManagerRegistry
+from custom_components.zone_manager.storage import ZoneManagerStorage
+
+CSV_OK = (
+    "space,zone,neighbors,far_neighbors,neighbor_groups,light_group\n"
+    'Этаж 4,sensor.ms_4_3_state,"sensor.ms_4_2_state, sensor.ms_4_4_state",,light.g_4_2,light.g_4_3\n'
+    "Этаж 6,sensor.ms_6_1_state,,,,light.g_6_1\n"
+)
+
+
+def test_parse_csv() -> None:
+    result = parse_import_text(CSV_OK, FORMAT_CSV, 50)
+
+    assert result.error_count == 0
+    assert result.rows == 2
+    zone = result.spaces["Этаж 4"]["sensor.ms_4_3_state"]
+    assert zone["neighbors"] == ["sensor.ms_4_2_state", "sensor.ms_4_4_state"]
+    assert zone["far_neighbors"] == []
+    assert zone["light_group"] == ["light.g_4_3"]
+    assert result.zones["sensor.ms_6_1_state"] == ("Этаж 6", 3)
+
+
+def test_parse_jsonl_lists_and_strings() -> None:
+    text = (
+        '{"space": "Этаж 4", "zone": "sensor.a", "neighbors": ["sensor.b"], "light_group": "light.x, light.y"}\n'
+        "# комментарий\n"
+        "\n"
+        '{"space": "Этаж 4", "zone": "sensor.b"}\n'
+    )
+    result = parse_import_text(text, FORMAT_JSONL, 50)
+
+    assert result.error_count == 0
+    assert result.rows == 2
+    assert result.spaces["Этаж 4"]["sensor.a"]["light_group"] == ["light.x", "light.y"]
+    assert result.spaces["Этаж 4"]["sensor.b"]["neighbors"] == []
+
+
+def test_parse_reports_errors_with_lines() -> None:
+    text = (
+        "space,zone,neighbors\n"
+        ",sensor.a,\n"  # строка 2: нет пространства
+        "Этаж 4,not an entity,\n"  # строка 3: кривой ключ зоны
+        "Этаж 4,sensor.b,bad id\n"  # строка 4: кривой сосед
+        "Этаж 4,sensor.c,\n"
+        "Этаж 5,sensor.c,\n"  # строка 6: повтор зоны
+    )
+    result = parse_import_text(text, FORMAT_CSV, 50)
+
+    codes = {(err["line"], err["code"]) for err in result.errors}
+    assert (2, "missing_space") in codes
+    assert (3, "invalid_entity_id") in codes
+    assert (4, "invalid_entity_id") in codes
+    assert (6, "duplicate_row") in codes
+    assert result.error_count == len(result.errors)
+
+
+def test_parse_truncates_errors() -> None:
+    text = "space,zone\n" + "".join(f"Этаж 4,bad {i}\n" for i in range(10))
+    result = parse_import_text(text, FORMAT_CSV, 3)
+
+    assert result.error_count == 10
+    assert len(result.errors) == 3
+
+
+def test_parse_csv_requires_header() -> None:
+    result = parse_import_text("a,b\n1,2\n", FORMAT_CSV, 50)
+
+    assert result.error_count == 1
+    assert result.errors[0]["code"] == "parse_error"
+
+
+def test_parse_jsonl_invalid_line() -> None:
+    result = parse_import_text('{"space": "A", "zone": "sensor.a"}\n{oops\n[1]\n', FORMAT_JSONL, 50)
+
+    assert [err["line"] for err in result.errors] == [2, 3]
+    assert "sensor.a" in result.spaces["A"]
+
+
+async def test_resolve_export_path_default_and_relative(hass: HomeAssistant) -> None:
+    export_dir = os.path.realpath(hass.config.path(EXPORT_DIR))
+
+    assert resolve_export_path(hass, None, FORMAT_CSV, set()) == os.path.join(export_dir, "zone_manager_export.csv")
+    assert resolve_export_path(hass, "sub/x.jsonl", FORMAT_JSONL, set()) == os.path.join(export_dir, "sub", "x.jsonl")
+    absolute = os.path.join(export_dir, "abs.csv")
+    assert resolve_export_path(hass, absolute, FORMAT_CSV, set()) == absolute
+
+
+@pytest.mark.parametrize(
+    ("path", "fmt", "reason"),
+    [
+        ("../configuration.yaml", FORMAT_CSV, "path_not_allowed"),
+        ("../secrets.csv", FORMAT_CSV, "path_not_allowed"),
+        ("/etc/passwd", FORMAT_CSV, "path_not_allowed"),
+        ("zones.yaml", FORMAT_CSV, "invalid_extension"),
+        ("zones.csv", FORMAT_JSONL, "invalid_extension"),
+    ],
+)
+async def test_resolve_export_path_rejects(hass: HomeAssistant, path: str, fmt: str, reason: str) -> None:
+    with pytest.raises(ValueError, match=reason):
+        resolve_export_path(hass, path, fmt, set())
+
+
+async def test_resolve_export_path_refuses_config_files(hass: HomeAssistant) -> None:
+    protected = os.path.join(hass.config.path(EXPORT_DIR), "zone_manager.csv")
+
+    with pytest.raises(ValueError, match="config_path"):
+        resolve_export_path(hass, "zone_manager.csv", FORMAT_CSV, {protected})
+
+
+async def test_apply_import(registry: ZoneManagerRegistry, storage: ZoneManagerStorage) -> None:
+    result = parse_import_text(CSV_OK, FORMAT_CSV, 50)
+
+    applied = await async_apply_import(registry, result, MODE_MERGE, None)
+
+    assert applied == {"created_spaces": 1, "files": 1, "failed_files": []}
+    assert registry.lookup("sensor.ms_4_3_state")[1] == "Этаж 4"
+    assert "sensor.ms_4_1_state" in storage.get_space("Этаж 4")["zones"]  # merge сохранил старые зоны
+
+
+async def test_apply_import_rolls_back_failed_file(registry: ZoneManagerRegistry, storage: ZoneManagerStorage) -> None:
+    before = dict(storage.get_space("Этаж 4")["zones"])
+    result = parse_import_text(CSV_OK, FORMAT_CSV, 50)
+
+    with patch(
+        "custom_components.zone_manager.storage._write_json_atomic_with_backup",
+        side_effect=OSError("disk full"),
+    ):
+        applied = await async_apply_import(registry, result, MODE_MERGE, None)
+
+    assert applied["failed_files"] == [storage.config_path]
+    assert storage.get_space("Этаж 6") is None
+    assert storage.get_space("Этаж 4")["zones"] == before
+    assert registry.lookup("sensor.ms_4_3_state") == (None, None, None)
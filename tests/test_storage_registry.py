@@ -0,0 +1,94 @@
+"""Уведомления storage и индекс registry (удаление, пересоздание, ошибки записи)."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.zone_manager.registry import ZoneManagerRegistry
+from custom_components.zone_manager.storage import ZoneManagerStorage
+
+from .conftest import async_make_storage
+
+
+async def test_listener_gets_deleted_space(storage: ZoneManagerStorage) -> None:
+    await storage.async_save()  # первое сохранение заполняет кэш фрагментов
+    changed: list[set[str] | None] = []
+    storage.async_add_listener(changed.append)
+
+    storage.delete_space("Этаж 5")
+    assert await storage.async_save()
+
+    assert changed == [{"Этаж 5"}]
+
+
+async def test_delete_then_recreate_space(registry: ZoneManagerRegistry, storage: ZoneManagerStorage) -> None:
+    assert registry.storage_for_space("Этаж 5") is storage
+    assert registry.references.locations("sensor.ms_5_1_state")
+
+    storage.delete_space("Этаж 5")
+    await storage.async_save()
+
+    assert "Этаж 5" not in [item["name"] for item in registry.list_spaces()]
+    assert registry.storage_for_space("Этаж 5") is None
+    assert registry.lookup("sensor.ms_5_1_state") == (None, None, None)
+    assert not registry.references.locations("sensor.ms_5_1_state")
+
+    storage.create_space("Этаж 5")
+    storage.save_space("Этаж 5", {"zones": {"sensor.ms_5_2_state": {"light_group": ["light.g_5_2"]}}})
+    await storage.async_save()
+
+    assert registry.storage_for_space("Этаж 5") is storage
+    _storage, space, zone = registry.lookup("sensor.ms_5_2_state")
+    assert space == "Этаж 5"
+    assert zone["light_group"] == ["light.g_5_2"]
+
+
+async def test_reindex_only_changed_space(registry: ZoneManagerRegistry, storage: ZoneManagerStorage) -> None:
+    zones = dict(storage.get_space("Этаж 4")["zones"])
+    zones.pop("sensor.ms_4_2_state")
+    storage.save_space("Этаж 4", {"zones": zones})
+    await storage.async_save()
+
+    assert registry.lookup("sensor.ms_4_2_state") == (None, None, None)
+    assert registry.lookup("sensor.ms_4_1_state")[1] == "Этаж 4"
+    assert registry.lookup("sensor.ms_5_1_state")[1] == "Этаж 5"
+
+
+async def test_failed_write_does_not_notify(storage: ZoneManagerStorage, config_path: str) -> None:
+    await storage.async_save()
+    changed: list[set[str] | None] = []
+    storage.async_add_listener(changed.append)
+    storage.delete_space("Этаж 5")
+
+    with patch(
+        "custom_components.zone_manager.storage._write_json_atomic_with_backup",
+        side_effect=OSError("read-only file system"),
+    ):
+        assert not await storage.async_save()
+    assert changed == []
+    assert "Этаж 5" in json.loads(open(config_path, encoding="utf-8").read())["spaces"]
+
+    # Следующее успешное сохранение записывает и рассылает отложенное изменение
+    assert await storage.async_save()
+    assert changed == [{"Этаж 5"}]
+    assert "Этаж 5" not in json.loads(open(config_path, encoding="utf-8").read())["spaces"]
+
+
+async def test_second_entry_and_remove(hass: HomeAssistant, registry: ZoneManagerRegistry, tmp_path) -> None:
+    path = tmp_path / "second.json"
+    path.write_text(
+        json.dumps({"version": "v0.1", "spaces": {"Корпус Б": {"zones": {"sensor.b_1_state": {}}}}}),
+        encoding="utf-8",
+    )
+    second = await async_make_storage(hass, str(path), entry_id="entry_2")
+    registry.async_add(second)
+
+    assert registry.lookup("sensor.b_1_state")[0] is second
+    assert [item["entry_id"] for item in registry.list_spaces() if item["name"] == "Корпус Б"] == ["entry_2"]
+
+    registry.async_remove("entry_2")
+    assert registry.lookup("sensor.b_1_state") == (None, None, None)
+    assert registry.storage_for_space("Корпус Б") is None
@@ -20,13 +20,125 @@ const WS = {
   spaceSave: "zone_manager/space_save",
   areasList: "zone_manager/areas_list",
   entitiesForArea: "zone_manager/entities_for_area",
+  bootstrap: "zone_manager/bootstrap",
+  subscribeRegistry: "zone_manager/subscribe_registry",
+  references: "zone_manager/references",
+  renameEntity: "zone_manager/rename_entity",
 };
 
+const ENTITY_DOMAINS = ["sensor", "light"];
+
 // Sentinel значения для UI (нельзя использовать пустую строку, иначе label не "флоатит" и накладывается на value)
 const UI_ALL_AREAS = "__all__";
 // Sentinel для "пустого выбора" в любых ha-select (иначе label может накладываться на value при value="")
 const UI_NONE = "__none__";
 
+// Виртуализация списка зон: включается, если зон больше порога.
+// Невидимые зоны рендерятся пустыми placeholder-блоками с последней измеренной высотой.
+const ZONE_VIRTUALIZE_MIN = 30;
+const ZONE_INITIAL_VISIBLE = 15;
+const ZONE_ESTIMATED_HEIGHT = 260;
+const ZONE_OBSERVER_MARGIN = "800px 0px";
+
+// Пауза перед перезапросом битых ссылок после изменений registry (пачки событий -> один запрос), мс
+const REFS_REFRESH_DELAY = 1000;
+
+
+// Общий кэш сущностей и area для всех экземпляров карточки на странице.
+// Зачем: фильтр по area применяется локально, без WS round trip и скана registry на сервере;
+// изменения registry приходят из подписки zone_manager/subscribe_registry.
+const zmEntityStore = {
+  ready: false,
+  entities: new Map(), // entity_id -> { entity_id, name, domain, area_id }
+  areas: [],
+  _sorted: null,
+  _filtered: new Map(), // areaId -> массив (один и тот же, пока кэш не менялся: мемоизация опций в карточке)
+  _listeners: new Set(),
+  _unsub: null,
+  _subscribing: null,
+
+  setAll(entities, areas) {
+    this.entities = new Map(entities.map((e) => [e.entity_id, e]));
+    if (Array.isArray(areas)) this.areas = areas;
+    this._sorted = null;
+    this._filtered.clear();
+    this.ready = true;
+    this._notify();
+  },
+
+  setAreas(areas) {
+    if (!Array.isArray(areas)) return;
+    this.areas = areas;
+    this._notify();
+  },
+
+  // Сортировка как на сервере: domain, name (без регистра), entity_id
+  list() {
+    if (!this._sorted) {
+      this._sorted = [...this.entities.values()].sort((a, b) =>
+        a.domain.localeCompare(b.domain) ||
+        (a.name || "").toLowerCase().localeCompare((b.name || "").toLowerCase()) ||
+        a.entity_id.localeCompare(b.entity_id)
+      );
+    }
+    return this._sorted;
+  },
+
+  filter(areaId) {
+    const all = this.list();
+    if (!areaId) return all;
+    let out = this._filtered.get(areaId);
+    if (!out) {
+      out = all.filter((e) => e.area_id === areaId);
+      this._filtered.set(areaId, out);
+    }
+    return out;
+  },
+
+  // Подписка одна на страницу; подписываемся ДО загрузки снимка, чтобы не потерять изменения между ними
+  async subscribe(hass) {
+    if (this._unsub) return;
+    if (!this._subscribing) {
+      this._subscribing = hass.connection
+        .subscribeMessage((ev) => this._onEvent(ev), { type: WS.subscribeRegistry, domains: ENTITY_DOMAINS })
+        .then((unsub) => {
+          this._unsub = unsub;
+        })
+        .finally(() => {
+          this._subscribing = null;
+        });
+    }
+    await this._subscribing;
+  },
+
+  _onEvent(ev) {
+    for (const id of ev?.removed || []) this.entities.delete(id);
+    for (const e of ev?.entities || []) this.entities.set(e.entity_id, e);
+    if (Array.isArray(ev?.areas)) this.areas = ev.areas;
+    this._sorted = null;
+    this._filtered.clear();
+    this._notify();
+  },
+
+  addListener(fn) {
+    this._listeners.add(fn);
+  },
+
+  removeListener(fn) {
+    this._listeners.delete(fn);
+    if (this._listeners.size > 0) return;
+    // Карточек на странице не осталось: отписываемся, кэш без подписки считаем устаревшим
+    if (this._unsub) {
+      this._unsub();
+      this._unsub = null;
+    }
+    this.ready = false;
+  },
+
+  _notify() {
+    for (const fn of this._listeners) fn();
+  },
+};
 
 class ZoneManagerCard extends LitElement {
   static get properties() {
@@ -57,6 +169,12 @@ class ZoneManagerCard extends LitElement {
 
       // drag state
       _drag: { state: false },
+
+      // 2.2: id select'а, для которого рендерится полный список опций (ленивые picker'ы)
+      _activePicker: { state: true },
+
+      // Битые/осиротевшие ссылки выбранного пространства (zone_manager/references)
+      _refProblems: { state: true },
     };
   }
 
@@ -85,6 +203,60 @@ class ZoneManagerCard extends LitElement {
     this._errors = [];
 
     this._drag = { zone: null, fromIndex: null };
+
+    this._activePicker = "";
+    // Мемоизация опций: массив сущностей -> массив шаблонов <mwc-list-item>
+    this._optionCache = new WeakMap();
+
+    // Виртуализация зон
+    this._visibleZones = new Set();
+    this._zoneHeights = new Map();
+    this._observedZoneEls = new Set();
+    this._zoneObserver = null;
+
+    // Ссылки считаются по сохранённому конфигу: zone -> [{ entity_id, status, field }]
+    this._refProblems = [];
+    this._refsByZone = new Map();
+    this._refsTimer = null;
+
+    // Фильтр по area локально по zmEntityStore (false — старый backend без bootstrap)
+    this._localEntities = false;
+    this._onStoreChange = () => {
+      if (!this._localEntities) return;
+      this._areas = zmEntityStore.areas;
+      this._applyAreaFilter();
+      // registry изменился — статусы ссылок могли поменяться
+      this._scheduleReferences();
+    };
+  }
+
+  connectedCallback() {
+    super.connectedCallback();
+    zmEntityStore.addListener(this._onStoreChange);
+
+    // Карточку вернули на страницу после того, как все экземпляры были сняты (кэш сброшен, подписки нет)
+    if (this._hass && this._localEntities && !zmEntityStore.ready) {
+      this._bootstrap("").catch((err) => this._log("Re-bootstrap error:", err));
+    }
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    zmEntityStore.removeListener(this._onStoreChange);
+    if (this._refsTimer) {
+      clearTimeout(this._refsTimer);
+      this._refsTimer = null;
+    }
+    if (this._zoneObserver) {
+      this._zoneObserver.disconnect();
+      this._zoneObserver = null;
+      this._observedZoneEls.clear();
+    }
+  }
+
+  updated(changedProps) {
+    super.updated?.(changedProps);
+    this._syncZoneObserver();
   }
 
   setConfig(config) {
@@ -254,6 +426,13 @@ class ZoneManagerCard extends LitElement {
 
 
 
+      .zone-placeholder {
+        margin-top: 10px;
+        border-radius: 14px;
+        border: 1px dashed var(--zm-border);
+        box-sizing: border-box;
+      }
+
       .zone-header {
         display: flex;
         justify-content: space-between;
@@ -390,6 +569,44 @@ class ZoneManagerCard extends LitElement {
         font-size: 12px;
         opacity: 0.75;
       }
+
+      /* Битые ссылки */
+      .badge {
+        display: inline-block;
+        padding: 2px 8px;
+        border-radius: 10px;
+        font-size: 12px;
+        font-weight: 700;
+        white-space: nowrap;
+        background: rgba(var(--rgb-warning-color, 255, 166, 0), 0.16);
+        border: 1px solid rgba(var(--rgb-warning-color, 255, 166, 0), 0.45);
+      }
+
+      .badge.dead {
+        background: rgba(var(--rgb-error-color), 0.14);
+        border-color: rgba(var(--rgb-error-color), 0.45);
+      }
+
+      .refs ul {
+        margin: 0;
+        padding-left: 0;
+        list-style: none;
+        display: flex;
+        flex-direction: column;
+        gap: 6px;
+      }
+
+      .refs li {
+        display: flex;
+        gap: 8px;
+        align-items: center;
+        flex-wrap: wrap;
+      }
+
+      .refs .entity {
+        font-weight: 700;
+        word-break: break-all;
+      }
     `;
   }
 
@@ -414,6 +631,7 @@ class ZoneManagerCard extends LitElement {
 
         <div class="content">
           ${this._renderErrors()}
+          ${this._renderReferences()}
           ${this._renderSpaceControls()}
           ${this._renderAreaFilter()}
           ${this._renderSpaceEditor()}
@@ -435,6 +653,41 @@ class ZoneManagerCard extends LitElement {
     `;
   }
 
+  _renderReferences() {
+    if (!this._selectedSpace || this._refProblems.length === 0) return html``;
+
+    const fieldShort = { zone: "ключ", light_group: "light_group", neighbors: "neighbors",
+      far_neighbors: "far_neighbors", neighbor_groups: "neighbor_groups" };
+
+    return html`
+      <div class="section refs">
+        <div class="section-title">Битые ссылки (${this._refProblems.length})</div>
+        <ul>
+          ${this._refProblems.map((p) => html`
+            <li>
+              ${this._renderRefBadge(p.status)}
+              <span class="entity">${p.entity_id}</span>
+              <span class="hint">
+                ${p.refs.map((r) => `${r.zone} → ${fieldShort[r.field] || r.field}`).join("; ")}
+              </span>
+              ${p.renamed_to ? html`<span class="hint">переименован в ${p.renamed_to}</span>` : html``}
+              <button class="mini-btn" ?disabled=${this._busy} @click=${() => this._onRenameEverywhere(p)}>
+                Переименовать везде
+              </button>
+            </li>
+          `)}
+        </ul>
+        <div class="hint">Статус считается по сохранённому конфигу и обновляется по изменениям registry.</div>
+      </div>
+    `;
+  }
+
+  _renderRefBadge(status) {
+    return status === "dead"
+      ? html`<span class="badge dead" title="Сущности нет в Home Assistant">нет сущности</span>`
+      : html`<span class="badge" title="Сущность отключена или не предоставляется интеграцией">недоступна</span>`;
+  }
+
   _formatError(e) {
     const zone = e?.zone || "";
     const field = e?.field || "";
@@ -582,16 +835,14 @@ class ZoneManagerCard extends LitElement {
 
           ${this._addingZone
             ? html`
-                <ha-select
-                  .label=${"Sensor entity_id (ключ зоны)"}
-                  .value=${this._newZoneSensor || UI_NONE}
-                  @selected=${(e) => (this._newZoneSensor = (e.target.value === UI_NONE ? "" : e.target.value))}
-                >
-                  <mwc-list-item .value=${UI_NONE}>Выберите датчик...</mwc-list-item>
-                  ${this._entitiesSensors.map(
-                    (en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`
-                  )}
-                </ha-select>
+                ${this._renderPicker(
+                  "__add_zone__",
+                  "Sensor entity_id (ключ зоны)",
+                  this._newZoneSensor,
+                  this._entitiesSensors,
+                  (v) => (this._newZoneSensor = v),
+                  "Выберите датчик..."
+                )}
 
                 <button class="btn" ?disabled=${this._busy || !this._newZoneSensor} @click=${this._onAddZone}>
                   Добавить
@@ -602,11 +853,126 @@ class ZoneManagerCard extends LitElement {
 
         ${zoneKeys.length === 0
           ? html`<div class="muted">Зоны отсутствуют.</div>`
-          : zoneKeys.map((zk) => this._renderZone(zk, zones[zk]))}
+          : this._renderZoneList(zoneKeys, zones)}
       </div>
     `;
   }
 
+  _renderZoneList(zoneKeys, zones) {
+    // Небольшие пространства рендерим целиком — виртуализация там не окупается
+    if (zoneKeys.length < ZONE_VIRTUALIZE_MIN) {
+      return zoneKeys.map((zk) => this._renderZone(zk, zones[zk]));
+    }
+
+    // Пока IntersectionObserver не отработал — показываем первые зоны, чтобы не было пустого экрана
+    if (this._visibleZones.size === 0) {
+      zoneKeys.slice(0, ZONE_INITIAL_VISIBLE).forEach((zk) => this._visibleZones.add(zk));
+    }
+
+    return zoneKeys.map((zk) =>
+      this._visibleZones.has(zk)
+        ? this._renderZone(zk, zones[zk])
+        : html`<div
+            class="zone-placeholder"
+            data-zone=${zk}
+            style=${`height:${this._zoneHeights.get(zk) || ZONE_ESTIMATED_HEIGHT}px`}
+          ></div>`
+    );
+  }
+
+  _resetZoneWindow() {
+    // Новое пространство: видимость/высоты старых зон не актуальны
+    this._visibleZones.clear();
+    this._zoneHeights.clear();
+    this._activePicker = "";
+  }
+
+  _syncZoneObserver() {
+    const root = this.shadowRoot;
+    if (!root || typeof IntersectionObserver === "undefined") return;
+
+    if (!this._zoneObserver) {
+      this._zoneObserver = new IntersectionObserver(
+        (entries) => this._onZoneIntersect(entries),
+        { rootMargin: ZONE_OBSERVER_MARGIN }
+      );
+    }
+
+    // Наблюдаем только текущие элементы [data-zone]; ушедшие из DOM — снимаем
+    const current = new Set(root.querySelectorAll("[data-zone]"));
+    for (const el of this._observedZoneEls) {
+      if (!current.has(el)) {
+        this._zoneObserver.unobserve(el);
+        this._observedZoneEls.delete(el);
+      }
+    }
+    for (const el of current) {
+      if (!this._observedZoneEls.has(el)) {
+        this._zoneObserver.observe(el);
+        this._observedZoneEls.add(el);
+      }
+    }
+  }
+
+  _onZoneIntersect(entries) {
+    let changed = false;
+    for (const entry of entries) {
+      const key = entry.target.dataset.zone;
+      const isPlaceholder = entry.target.classList.contains("zone-placeholder");
+      if (!isPlaceholder && entry.boundingClientRect.height > 0) {
+        this._zoneHeights.set(key, Math.round(entry.boundingClientRect.height));
+      }
+      if (entry.isIntersecting && !this._visibleZones.has(key)) {
+        this._visibleZones.add(key);
+        changed = true;
+      } else if (!entry.isIntersecting && this._visibleZones.has(key)) {
+        this._visibleZones.delete(key);
+        changed = true;
+      }
+    }
+    if (changed) this.requestUpdate();
+  }
+
+  // Ленивый picker: полный список опций рендерится только у активного select
+  // (в фокусе / под указателем). Остальные держат единственный пункт — текущее значение.
+  _renderPicker(pickerId, label, value, options, onChange, noneLabel = "Выберите...") {
+    const active = this._activePicker === pickerId;
+    const current = value || "";
+
+    return html`
+      <ha-select
+        .label=${label}
+        .value=${current || UI_NONE}
+        @pointerdown=${() => this._activatePicker(pickerId)}
+        @focusin=${() => this._activatePicker(pickerId)}
+        @selected=${(e) => {
+          const v = e.target.value === UI_NONE ? "" : (e.target.value || "");
+          // select перевыбирает пункт при смене списка опций — это не правка пользователя
+          if (v === current) return;
+          onChange(v);
+        }}
+      >
+        ${noneLabel !== null ? html`<mwc-list-item .value=${UI_NONE}>${noneLabel}</mwc-list-item>` : html``}
+        ${active
+          ? this._optionItems(options)
+          : (current ? html`<mwc-list-item .value=${current}>${current}</mwc-list-item>` : html``)}
+      </ha-select>
+    `;
+  }
+
+  _activatePicker(pickerId) {
+    if (this._activePicker !== pickerId) this._activePicker = pickerId;
+  }
+
+  _optionItems(options) {
+    let items = this._optionCache.get(options);
+    if (!items) {
+      items = options.map((en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`);
+      this._optionCache.set(options, items);
+    }
+    return items;
+  }
+
   _renderZone(zoneKey, zoneObj) {
     const z = zoneObj || {};
 
@@ -615,22 +981,24 @@ class ZoneManagerCard extends LitElement {
     const hasErrGroups = this._hasFieldError(zoneKey, "neighbor_groups");
 
     return html`
-      <div class="zone">
+      <div class="zone" data-zone=${zoneKey}>
         <div class="zone-header">
-          <div class="key">${zoneKey}</div>
+          <div class="key">
+            ${zoneKey}
+            ${this._renderZoneRefBadge(zoneKey)}
+          </div>
           <button class="mini-btn danger" ?disabled=${this._busy} @click=${() => this._onDeleteZone(zoneKey)}>Удалить зону</button>
         </div>
 
         <div class="row">
-          <ha-select
-            .label=${"Датчик зоны (ключ)"}
-            .value=${zoneKey}
-            @selected=${(e) => this._onRenameZoneKey(zoneKey, e.target.value)}
-          >
-            ${this._entitiesSensors.map(
-              (en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`
-            )}
-          </ha-select>
+          ${this._renderPicker(
+            `${zoneKey}|key`,
+            "Датчик зоны (ключ)",
+            zoneKey,
+            this._entitiesSensors,
+            (v) => this._onRenameZoneKey(zoneKey, v),
+            null
+          )}
           <div class="small-note">
             Порядок строк важен: пары обрабатываются по индексу.
           </div>
@@ -648,13 +1016,22 @@ class ZoneManagerCard extends LitElement {
             "Основная группа света (light)",
             z.light_group,
             this._entitiesLights,
-            (newArr) => this._setZoneField(zoneKey, "light_group", newArr)
+            (newArr) => this._setZoneField(zoneKey, "light_group", newArr),
+            `${zoneKey}|light_group`
           )}
         </div>
       </div>
     `;
   }
 
+  _renderZoneRefBadge(zoneKey) {
+    const refs = this._refsByZone.get(zoneKey);
+    if (!refs) return html``;
+    const dead = refs.some((r) => r.status === "dead");
+    const title = refs.map((r) => `${r.field}: ${r.entity_id}`).join("\n");
+    return html`<span class=${this._cx({ badge: true, dead })} title=${title}>⚠ ${refs.length}</span>`;
+  }
+
   _renderPairRows(zoneKey, z) {
     const neighbors = Array.isArray(z.neighbors) ? [...z.neighbors] : [];
     const far = Array.isArray(z.far_neighbors) ? [...z.far_neighbors] : [];
@@ -733,38 +1110,29 @@ class ZoneManagerCard extends LitElement {
           >
             <div class="drag-handle">☰</div>
 
-            <ha-select
-              .label=${"Сосед (sensor)"}
-              .value=${neighbors[idx] || UI_NONE}
-              @selected=${(e) => setRow(idx, "neighbors", (e.target.value === UI_NONE ? "" : e.target.value))}
-            >
-              <mwc-list-item .value=${UI_NONE}>Выберите...</mwc-list-item>
-              ${this._entitiesSensors.map(
-                (en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`
-              )}
-            </ha-select>
-
-            <ha-select
-              .label=${"Дальний сосед (sensor)"}
-              .value=${far[idx] || UI_NONE}
-              @selected=${(e) => setRow(idx, "far_neighbors", (e.target.value === UI_NONE ? "" : e.target.value))}
-            >
-              <mwc-list-item .value=${UI_NONE}>Выберите...</mwc-list-item>
-              ${this._entitiesSensors.map(
-                (en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`
-              )}
-            </ha-select>
-
-            <ha-select
-              .label=${"Группа соседнего света (light)"}
-              .value=${groups[idx] || UI_NONE}
-              @selected=${(e) => setRow(idx, "neighbor_groups", (e.target.value === UI_NONE ? "" : e.target.value))}
-            >
-              <mwc-list-item .value=${UI_NONE}>Выберите...</mwc-list-item>
-              ${this._entitiesLights.map(
-                (en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`
-              )}
-            </ha-select>
+            ${this._renderPicker(
+              `${zoneKey}|neighbors|${idx}`,
+              "Сосед (sensor)",
+              neighbors[idx],
+              this._entitiesSensors,
+              (v) => setRow(idx, "neighbors", v)
+            )}
+
+            ${this._renderPicker(
+              `${zoneKey}|far_neighbors|${idx}`,
+              "Дальний сосед (sensor)",
+              far[idx],
+              this._entitiesSensors,
+              (v) => setRow(idx, "far_neighbors", v)
+            )}
+
+            ${this._renderPicker(
+              `${zoneKey}|neighbor_groups|${idx}`,
+              "Группа соседнего света (light)",
+              groups[idx],
+              this._entitiesLights,
+              (v) => setRow(idx, "neighbor_groups", v)
+            )}
 
             <button class="mini-btn danger xbtn" ?disabled=${this._busy} @click=${() => removeRow(idx)}>X</button>
           </div>
@@ -789,7 +1157,7 @@ class ZoneManagerCard extends LitElement {
     this._markDirty();
   }
 
-  _renderSingleList(label, arr, options, onChange) {
+  _renderSingleList(label, arr, options, onChange, pickerPrefix) {
     const list = Array.isArray(arr) ? [...arr] : [];
 
     const addRow = () => {
@@ -814,16 +1182,7 @@ class ZoneManagerCard extends LitElement {
           ${list.map(
             (val, idx) => html`
               <div style="display:flex; gap:8px; align-items:center;">
-                <ha-select
-                  .label=${label}
-                  .value=${val || UI_NONE}
-                  @selected=${(e) => setAt(idx, (e.target.value === UI_NONE ? "" : e.target.value))}
-                >
-                  <mwc-list-item .value=${UI_NONE}>Выберите...</mwc-list-item>
-                  ${options.map(
-                    (en) => html`<mwc-list-item .value=${en.entity_id}>${en.entity_id}</mwc-list-item>`
-                  )}
-                </ha-select>
+                ${this._renderPicker(`${pickerPrefix}|${idx}`, label, val, options, (v) => setAt(idx, v))}
                 <button class="mini-btn danger" ?disabled=${this._busy} @click=${() => removeAt(idx)}>X</button>
               </div>
             `
@@ -839,16 +1198,59 @@ class ZoneManagerCard extends LitElement {
   // -----------------------
 
   async _initialLoad() {
+    // Пространство из конфига карточки (type: custom:zone-manager-card, space: "...") — выбираем сразу
+    const initialSpace = (this._config?.space || "").trim();
+
     try {
       this._busy = true;
-      await this._loadSpaces();
-      await this._loadAreas();
-      await this._loadEntitiesForArea(""); // all
+      try {
+        await this._bootstrap(initialSpace);
+      } catch (err) {
+        // Старый backend без zone_manager/bootstrap: по отдельности, но параллельно
+        this._log("Bootstrap failed, fallback to separate calls:", err);
+        await Promise.all([this._loadSpaces(), this._loadAreas(), this._loadEntitiesForArea("")]);
+        if (initialSpace && this._spaces.some((s) => s.name === initialSpace)) {
+          this._selectedSpace = initialSpace;
+          await this._loadSpace(initialSpace);
+        }
+      }
     } finally {
       this._busy = false;
     }
   }
 
+  async _bootstrap(spaceName) {
+    // Один round trip: spaces + areas + все сущности (+ пространство, если запрошено).
+    // Сущности не запрашиваем, если общий кэш уже заполнен другим экземпляром карточки.
+    await zmEntityStore.subscribe(this.hass);
+    const needEntities = !zmEntityStore.ready;
+
+    const msg = { type: WS.bootstrap, domains: ENTITY_DOMAINS, include_entities: needEntities };
+    if (spaceName) msg.space = spaceName;
+
+    const res = await this.hass.callWS(msg);
+    this._spaces = res.spaces || [];
+    this._localEntities = true;
+    if (needEntities && Array.isArray(res.entities)) {
+      zmEntityStore.setAll(res.entities, res.areas || []);
+    } else {
+      zmEntityStore.setAreas(res.areas || []);
+    }
+    this._areas = zmEntityStore.areas;
+    this._applyAreaFilter();
+
+    if (res.space?.data) {
+      this._selectedSpace = res.space.space;
+      this._spaceDraft = res.space.data;
+      this._dirty = false;
+      this._errors = [];
+      this._resetZoneWindow();
+      this._loadReferences();
+    }
+
+    this._log("Bootstrap loaded:", { spaces: this._spaces.length, areas: this._areas.length });
+  }
+
   async _loadSpaces() {
     const res = await this.hass.callWS({ type: WS.spacesList });
     this._spaces = res.spaces || [];
@@ -861,11 +1263,18 @@ class ZoneManagerCard extends LitElement {
     this._log("Areas loaded:", this._areas.length);
   }
 
+  _applyAreaFilter() {
+    const areaId = this._areaFilter === UI_ALL_AREAS ? "" : this._areaFilter;
+    this._setEntities(zmEntityStore.filter(areaId));
+  }
+
   async _loadEntitiesForArea(areaId) {
-    const msg = { type: WS.entitiesForArea, area_id: areaId || null, domains: ["sensor", "light"] };
+    const msg = { type: WS.entitiesForArea, area_id: areaId || null, domains: ENTITY_DOMAINS };
     const res = await this.hass.callWS(msg);
-    const entities = res.entities || [];
+    this._setEntities(res.entities || []);
+  }
 
+  _setEntities(entities) {
     this._entitiesSensors = entities.filter((e) => e.domain === "sensor");
     this._entitiesLights = entities.filter((e) => e.domain === "light");
 
@@ -879,6 +1288,45 @@ class ZoneManagerCard extends LitElement {
     // Сбрасываем состояния UI
     this._dirty = false;
     this._errors = [];
+    this._resetZoneWindow();
+    this._loadReferences();
+  }
+
+  async _loadReferences() {
+    const space = this._selectedSpace;
+    if (!space) {
+      this._setReferences([]);
+      return;
+    }
+    try {
+      const res = await this.hass.callWS({ type: WS.references, space });
+      // Пока шёл запрос, могли выбрать другое пространство
+      if (space === this._selectedSpace) this._setReferences(res.problems || []);
+    } catch (err) {
+      // Старый backend без zone_manager/references — просто без бейджей
+      this._log("References load error:", err);
+      this._setReferences([]);
+    }
+  }
+
+  _setReferences(problems) {
+    const byZone = new Map();
+    for (const p of problems) {
+      for (const r of p.refs || []) {
+        if (!byZone.has(r.zone)) byZone.set(r.zone, []);
+        byZone.get(r.zone).push({ entity_id: p.entity_id, status: p.status, field: r.field });
+      }
+    }
+    this._refsByZone = byZone;
+    this._refProblems = problems;
+  }
+
+  _scheduleReferences() {
+    if (this._refsTimer || !this._selectedSpace) return;
+    this._refsTimer = setTimeout(() => {
+      this._refsTimer = null;
+      this._loadReferences();
+    }, REFS_REFRESH_DELAY);
   }
 
   // -----------------------
@@ -922,6 +1370,7 @@ class ZoneManagerCard extends LitElement {
       this._spaceDraft = null;
       this._dirty = false;
       this._errors = [];
+      this._setReferences([]);
       await this._loadSpaces();
     } catch (e) {
       this._log("Delete space error:", e);
@@ -939,6 +1388,7 @@ class ZoneManagerCard extends LitElement {
     this._spaceDraft = null;
     this._dirty = false;
     this._errors = [];
+    this._setReferences([]);
     return;
     }
 
@@ -959,6 +1409,12 @@ class ZoneManagerCard extends LitElement {
     // UI хранит выбранное значение как есть (включая sentinel)
     this._areaFilter = areaId;
 
+    if (this._localEntities) {
+      // Фильтруем общий кэш локально — без запроса к backend
+      this._applyAreaFilter();
+      return;
+    }
+
     // Для backend: sentinel трактуем как "нет фильтра"
     const backendAreaId = (areaId === UI_ALL_AREAS) ? "" : areaId;
 
@@ -996,6 +1452,8 @@ class ZoneManagerCard extends LitElement {
     };
 
     this._spaceDraft = { ...this._spaceDraft, zones: { ...zones } };
+    // Новую зону показываем сразу, не дожидаясь IntersectionObserver
+    this._visibleZones.add(sensorId);
     this._addingZone = false;
     this._newZoneSensor = "";
     this._markDirty();
@@ -1021,6 +1479,8 @@ class ZoneManagerCard extends LitElement {
     delete zones[oldKey];
     zones[newKey] = payload;
 
+    if (this._visibleZones.delete(oldKey)) this._visibleZones.add(newKey);
+
     this._spaceDraft = { ...this._spaceDraft, zones };
     this._markDirty();
   }
@@ -1064,6 +1524,7 @@ class ZoneManagerCard extends LitElement {
       await this._loadSpaces();
       this._dirty = false;
       this._errors = [];
+      this._loadReferences();
 
     } catch (err) {
       this._log("Save error:", err);
@@ -1073,6 +1534,30 @@ class ZoneManagerCard extends LitElement {
     }
   }
 
+  async _onRenameEverywhere(problem) {
+    const oldId = problem.entity_id;
+    const newId = (prompt(`Новый entity_id вместо "${oldId}" (во всех пространствах):`, problem.renamed_to || oldId) || "").trim();
+    if (!newId || newId === oldId) return;
+    if (this._dirty && !confirm("Несохранённые изменения пространства будут потеряны. Продолжить?")) return;
+
+    try {
+      this._busy = true;
+      const res = await this.hass.callWS({ type: WS.renameEntity, old_entity_id: oldId, new_entity_id: newId });
+      if (res?.ok === false) {
+        this._errors = Array.isArray(res.errors) ? res.errors : [{ zone: "", field: "save", code: "validation_failed", text: "Validation failed" }];
+        return;
+      }
+      this._log("Renamed everywhere:", oldId, "->", newId, res);
+      await this._loadSpaces();
+      await this._loadSpace(this._selectedSpace);
+    } catch (err) {
+      this._log("Rename error:", err);
+      this._errors = [{ zone: "", field: "save", code: "save_failed", text: "Failed to rename entity" }];
+    } finally {
+      this._busy = false;
+    }
+  }
+
   async _onRefresh() {
     if (!this._selectedSpace) return;
 